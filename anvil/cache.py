@@ -1,8 +1,57 @@
 """Caching layer using SQLite for persistent storage."""
 
 import sqlite3
+import threading
+import weakref
+from collections import OrderedDict
 from pathlib import Path
-from typing import Optional
+from typing import Iterable, Optional
+
+# Statement text is hoisted so every call hands sqlite3 the same string, which
+# keeps hits in the connection's prepared-statement cache
+_GET_SQL = "SELECT value FROM cache WHERE key = ?"
+_SET_SQL = "INSERT OR REPLACE INTO cache (key, value) VALUES (?, ?)"
+_CLEAR_SQL = "DELETE FROM cache"
+
+# Upper bound on entries kept in the in-process LRU in front of SQLite
+_MEMORY_CACHE_SIZE = 1024
+_SCHEMA_SQL = "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'cache'"
+
+# STRICT tables need SQLite 3.37+; older libraries just get the rowid-less layout
+_TABLE_OPTIONS = (
+    "WITHOUT ROWID, STRICT"
+    if sqlite3.sqlite_version_info >= (3, 37, 0)
+    else "WITHOUT ROWID"
+)
+
+# The key is the only lookup path, so a WITHOUT ROWID table clustered on it
+# answers get() with a single B-tree walk instead of index + rowid heap.
+# created_at is a unix epoch integer rather than a timestamp string.
+_CREATE_SQL = """
+    CREATE TABLE {table} (
+        key TEXT PRIMARY KEY,
+        value TEXT NOT NULL,
+        created_at INTEGER DEFAULT (CAST(strftime('%s', 'now') AS INTEGER))
+    ) """ + _TABLE_OPTIONS
+
+
+def _close_connection(conn: sqlite3.Connection) -> None:
+    """Optimize, checkpoint and close a cache connection."""
+    try:
+        # Refresh planner statistics and fold the WAL back into the database
+        # so it doesn't keep growing across sessions
+        conn.execute("PRAGMA optimize")
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    except sqlite3.Error:
+        pass
+    finally:
+        conn.close()
+
+
+def _is_current_schema(sql: str) -> bool:
+    """Check whether a stored CREATE TABLE statement matches the current layout."""
+    normalized = " ".join(sql.upper().split())
+    return "WITHOUT ROWID" in normalized and "CREATED_AT INTEGER" in normalized
 
 
 class Cache:
@@ -13,19 +62,64 @@ class Cache:
         self.cache_dir = Path.home() / ".cache" / "anvil"
         self.cache_dir.mkdir(parents=True, exist_ok=True)
         self.db_path = self.cache_dir / "cache.db"
+        # One connection for the lifetime of the cache; autocommit mode so each
+        # statement is its own transaction without an explicit commit()
+        self._conn = sqlite3.connect(
+            self.db_path,
+            check_same_thread=False,
+            isolation_level=None,
+            cached_statements=256,
+        )
+        self._lock = threading.Lock()
+        # In-process LRU so repeated reads of a hot key skip SQLite entirely
+        self._mem: OrderedDict[str, str] = OrderedDict()
+        # Closes the connection when the cache is garbage collected or at
+        # interpreter exit, without keeping the instance alive until then
+        self._finalizer = weakref.finalize(self, _close_connection, self._conn)
         self._init_db()
 
     def _init_db(self) -> None:
         """Initialize the database schema."""
-        with sqlite3.connect(self.db_path) as conn:
-            conn.execute("""
-                CREATE TABLE IF NOT EXISTS cache (
-                    key TEXT PRIMARY KEY,
-                    value TEXT NOT NULL,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        with self._lock:
+            row = self._conn.execute(_SCHEMA_SQL).fetchone()
+            if row is None or not _is_current_schema(row[0]):
+                self._migrate_schema()
+            # WAL lets readers proceed alongside a writer and turns commits into
+            # appends instead of full journal rewrites. journal_mode persists in
+            # the database file; the rest apply to this connection.
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute("PRAGMA cache_size=-2000")
+            self._conn.execute("PRAGMA temp_store=MEMORY")
+            self._conn.execute("PRAGMA mmap_size=134217728")
+            self._conn.execute("PRAGMA cache_spill=0")
+
+    def _migrate_schema(self) -> None:
+        """Create the cache table, or rebuild one made by older versions.
+
+        BEGIN IMMEDIATE takes the write lock before the schema is read again,
+        so when several processes open the same database only the first one
+        creates or converts the table. The others then find the current layout
+        and leave it alone, instead of converting created_at a second time.
+        """
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = self._conn.execute(_SCHEMA_SQL).fetchone()
+            if row is None:
+                self._conn.execute(_CREATE_SQL.format(table="cache"))
+            elif not _is_current_schema(row[0]):
+                self._conn.execute(_CREATE_SQL.format(table="cache_new"))
+                self._conn.execute(
+                    "INSERT INTO cache_new (key, value, created_at) "
+                    "SELECT key, value, CAST(strftime('%s', created_at) AS INTEGER) "
+                    "FROM cache"
                 )
-            """)
-            conn.commit()
+                self._conn.execute("DROP TABLE cache")
+                self._conn.execute("ALTER TABLE cache_new RENAME TO cache")
+        except Exception:
+            self._conn.execute("ROLLBACK")
+            raise
+        self._conn.execute("COMMIT")
 
     def get(self, key: str) -> Optional[str]:
         """Get value by key from cache.
@@ -36,10 +130,18 @@ class Cache:
         Returns:
             The cached value or None if not found
         """
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.execute("SELECT value FROM cache WHERE key = ?", (key,))
+        with self._lock:
+            if key in self._mem:
+                self._mem.move_to_end(key)
+                return self._mem[key]
+
+            cursor = self._conn.execute(_GET_SQL, (key,))
             result = cursor.fetchone()
-            return result[0] if result else None
+            if result is None:
+                return None
+            value: str = result[0]
+            self._remember(key, value)
+            return value
 
     def set(self, key: str, value: str) -> None:
         """Set key-value pair in cache.
@@ -48,18 +150,52 @@ class Cache:
             key: The cache key
             value: The value to store
         """
-        with sqlite3.connect(self.db_path) as conn:
-            conn.execute(
-                "INSERT OR REPLACE INTO cache (key, value) VALUES (?, ?)",
-                (key, value)
-            )
-            conn.commit()
+        with self._lock:
+            self._conn.execute(_SET_SQL, (key, value))
+            self._remember(key, value)
+
+    def set_many(self, items: Iterable[tuple[str, str]]) -> None:
+        """Set several key-value pairs in a single transaction.
+
+        Args:
+            items: The (key, value) pairs to store
+        """
+        items = list(items)
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.executemany(_SET_SQL, items)
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+            for key, value in items:
+                self._remember(key, value)
 
     def clear(self) -> None:
         """Clear all cached data."""
-        with sqlite3.connect(self.db_path) as conn:
-            conn.execute("DELETE FROM cache")
-            conn.commit()
+        with self._lock:
+            self._conn.execute(_CLEAR_SQL)
+            self._mem.clear()
+
+    def _remember(self, key: str, value: str) -> None:
+        """Store a value in the in-memory LRU, evicting the oldest if full.
+
+        Callers must hold ``self._lock``.
+        """
+        self._mem[key] = value
+        self._mem.move_to_end(key)
+        if len(self._mem) > _MEMORY_CACHE_SIZE:
+            self._mem.popitem(last=False)
+
+    def close(self) -> None:
+        """Optimize, checkpoint and close the underlying database connection.
+
+        Safe to call more than once; it also runs when the cache is garbage
+        collected or at interpreter exit.
+        """
+        with self._lock:
+            self._finalizer()
 
 
 # Global cache instance
@@ -1,17 +1,18 @@
 """Main CLI entry point for anvil."""
 
+import functools
 import importlib
 import json
 import pkgutil
-import subprocess
 import sys
+from concurrent.futures import Future, ThreadPoolExecutor
+from importlib.metadata import EntryPoint, entry_points
 from pathlib import Path
+from types import ModuleType
 
 import typer
-from PIL import Image
 
 from . import __version__
-from .repl import repl
 from .commands import sketch
 
 # ASCII logo using figlet-style text
@@ -41,6 +42,9 @@ state = GlobalState()
 def main(ctx: typer.Context) -> None:
     """Launch REPL when no sub-command is provided."""
     if ctx.invoked_subcommand is None:
+        # Only needed for interactive sessions, so not imported up front
+        from .repl import repl
+
         repl()
 
 
@@ -53,6 +57,9 @@ def version() -> None:
 @app.command()
 def palette(image_path: str) -> None:
     """Extract color palette from an image."""
+    # Deferred so commands that never touch images don't pay for importing PIL
+    from .commands.palette import dominant_colors, load_reduced_image
+
     image_file = Path(image_path)
 
     if not image_file.exists():
@@ -62,51 +69,28 @@ def palette(image_path: str) -> None:
     print(f"🎨 Extracting colors from: {image_file}")
 
     try:
-        with Image.open(image_file) as img:
-            # Convert to RGB if necessary
-            if img.mode != "RGB":
-                img = img.convert("RGB")
-
-            # Resize image for faster processing
-            img.thumbnail((150, 150))
-
-            # Get colors using quantize
-            quantized = img.quantize(colors=5)
-            palette_colors = quantized.getpalette()
-
-            # Convert RGB tuples to hex
-            hex_colors = []
-            if palette_colors:
-                max_colors = min(5, len(palette_colors) // 3)
-                for i in range(max_colors):
-                    r = palette_colors[i * 3]
-                    g = palette_colors[i * 3 + 1]
-                    b = palette_colors[i * 3 + 2]
-                    hex_color = f"#{r:02x}{g:02x}{b:02x}"
-                    hex_colors.append(hex_color)
-
-            # If we didn't get enough colors, add some default ones
-            if len(hex_colors) < 5:
-                # Get the dominant color from the image
-                pixels = list(img.getdata())
-                if pixels:
-                    r, g, b = pixels[0]
-                    hex_colors.append(f"#{r:02x}{g:02x}{b:02x}")
-
-                # Fill remaining with black
-                while len(hex_colors) < 5:
-                    hex_colors.append("#000000")
-
-            # Print colors as JSON
-            colors_json = json.dumps(hex_colors, indent=2)
-            print("🌈 Extracted colors:")
-            print(colors_json)
-
-            # Save to file
-            output_path = image_file.parent / f"{image_file.stem}_palette.json"
-            with open(output_path, "w") as f:
-                json.dump(hex_colors, f, indent=2)
-            print(f"✓ Saved palette to: {output_path}")
+        img = load_reduced_image(image_file)
+        hex_colors = dominant_colors(img, 5)
+
+        # If we didn't get enough colors, add some default ones
+        if len(hex_colors) < 5:
+            # Get the first pixel's color without materializing every pixel
+            if img.width and img.height:
+                hex_colors.append(f"#{img.crop((0, 0, 1, 1)).tobytes().hex()}")
+
+            # Fill remaining with black
+            while len(hex_colors) < 5:
+                hex_colors.append("#000000")
+
+        # Print colors as JSON
+        colors_json = json.dumps(hex_colors, indent=2)
+        print("🌈 Extracted colors:")
+        print(colors_json)
+
+        # Save to file
+        output_path = image_file.parent / f"{image_file.stem}_palette.json"
+        output_path.write_text(colors_json)
+        print(f"✓ Saved palette to: {output_path}")
 
     except Exception as e:
         print(f"✗ Failed to process image: {e}", file=sys.stderr)
@@ -116,6 +100,8 @@ def palette(image_path: str) -> None:
 @app.command()
 def upgrade() -> None:
     """Upgrade anvil to the latest version using pipx."""
+    import subprocess
+
     try:
         result = subprocess.run(
             ["pipx", "upgrade", "anvil-cli"],
@@ -133,35 +119,65 @@ def upgrade() -> None:
         raise typer.Exit(1)
 
 
+# Set once plugins have been registered; discovery only needs to run once
+_plugins_registered = False
+
+
+@functools.cache
+def _entry_points(group: str) -> tuple[EntryPoint, ...]:
+    """Return the installed entry points in ``group``.
+
+    Scanning installed distributions' metadata is the slow part of plugin
+    discovery, so it happens once per group per process.
+    """
+    return tuple(entry_points(group=group))
+
+
 def discover_and_register_plugins() -> None:
-    """Discover and register plugins from anvil/plugins/ and entry points."""
-    # Register built-in plugins from anvil/plugins/
-    try:
-        from . import plugins as plugins_package
-        for _, name, _ in pkgutil.iter_modules(plugins_package.__path__, plugins_package.__name__ + "."):
-            try:
-                module = importlib.import_module(name)
-                if hasattr(module, "register"):
-                    module.register(app)
-                    print(f"Registered built-in plugin: {name.split('.')[-1]}")
-            except Exception as e:
-                print(f"Failed to load built-in plugin {name}: {e}")
-    except ImportError:
-        pass
-
-    # Register third-party plugins via entry points
-    try:
-        import pkg_resources
-        for entry_point in pkg_resources.iter_entry_points("anvil.plugins"):
-            try:
-                plugin = entry_point.load()
-                if hasattr(plugin, "register"):
-                    plugin.register(app)
-                    print(f"Registered external plugin: {entry_point.name}")
-            except Exception as e:
-                print(f"Failed to load external plugin {entry_point.name}: {e}")
-    except ImportError:
-        pass
+    """Discover and register plugins from anvil/plugins/ and entry points.
+
+    Plugin modules are imported concurrently; registration with the Typer app
+    happens afterwards, one plugin at a time, in discovery order. Later calls
+    are no-ops.
+    """
+    global _plugins_registered
+    if _plugins_registered:
+        return
+    _plugins_registered = True
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        # Import built-in plugins from anvil/plugins/
+        builtin: list[tuple[str, Future[ModuleType]]] = []
+        try:
+            from . import plugins as plugins_package
+            for _, name, _ in pkgutil.iter_modules(plugins_package.__path__, plugins_package.__name__ + "."):
+                builtin.append((name, executor.submit(importlib.import_module, name)))
+        except ImportError:
+            pass
+
+        # Load third-party plugins via entry points
+        external = [
+            (entry_point.name, executor.submit(entry_point.load))
+            for entry_point in _entry_points("anvil.plugins")
+        ]
+
+    for name, future in builtin:
+        try:
+            module = future.result()
+            if hasattr(module, "register"):
+                module.register(app)
+                print(f"Registered built-in plugin: {name.split('.')[-1]}")
+        except Exception as e:
+            print(f"Failed to load built-in plugin {name}: {e}")
+
+    for name, future in external:
+        try:
+            plugin = future.result()
+            if hasattr(plugin, "register"):
+                plugin.register(app)
+                print(f"Registered external plugin: {name}")
+        except Exception as e:
+            print(f"Failed to load external plugin {name}: {e}")
 
 
 # Discover and register plugins
@@ -1,60 +1,168 @@
 """Sketch command for generating creative content using v0 API."""
 
+import atexit
+import functools
 import json
 import os
-import re
 import sys
+import tempfile
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict, Any, Optional, Set
+from typing import (
+    TYPE_CHECKING, Dict, Any, AsyncIterator, Callable, Coroutine, Iterator, Optional, Set, TypeVar
+)
 
-import httpx
 import typer
-from dotenv import load_dotenv
+from dotenv import dotenv_values
 from rich.console import Console
 from rich.live import Live
 from rich.panel import Panel
-from rich.syntax import Syntax
 from rich.text import Text
 
+# orjson works directly with bytes and is several times faster than json;
+# fall back to the standard library when the optional extra isn't installed
+json_dumps: Callable[[Any], bytes]
+json_loads: Callable[[bytes], Any]
+try:
+    from orjson import dumps as json_dumps
+    from orjson import loads as json_loads
+except ImportError:  # pragma: no cover
+    from json import loads as json_loads
+
+    def _json_dumps_fallback(obj: Any) -> bytes:
+        """Serialize to UTF-8 JSON bytes, matching orjson.dumps."""
+        return json.dumps(obj, ensure_ascii=False).encode()
+
+    json_dumps = _json_dumps_fallback
+
+# httpx takes longer to import than the rest of the CLI combined, so it is
+# only imported by the code that makes requests
+if TYPE_CHECKING:
+    import asyncio
+
+    import httpx
+
+T = TypeVar("T")
+
 app = typer.Typer(name="sketch", help="Generate creative content from text prompts using v0 API")
 console = Console()
 
 V0_API_URL = "https://api.v0.dev/v1/chat/completions"
 
-# File extensions to include in codebase analysis
-INCLUDE_EXTENSIONS = {
+# Prefix of the payload lines in the API's server-sent event stream
+SSE_DATA_PREFIX = b"data: "
+
+# File extensions to include in codebase analysis (lowercase, matched against
+# the lowercased suffix)
+INCLUDE_EXTENSIONS = frozenset({
     '.py', '.js', '.jsx', '.ts', '.tsx', '.css', '.scss', '.sass', '.less',
     '.html', '.htm', '.vue', '.svelte', '.json', '.yaml', '.yml', '.toml',
     '.md', '.mdx', '.txt', '.env', '.gitignore', '.dockerignore',
     '.sql', '.graphql', '.gql', '.xml', '.svg'
-}
+})
 
 # Directories to exclude from analysis
-EXCLUDE_DIRS = {
+EXCLUDE_DIRS = frozenset({
     'node_modules', '.git', '.svn', '.hg', '__pycache__', '.pytest_cache',
     '.mypy_cache', '.ruff_cache', 'dist', 'build', '.next', '.nuxt',
     'coverage', 'htmlcov', '.coverage', '.env', '.venv', 'venv', 'env',
     '.DS_Store', 'Thumbs.db', '.idea', '.vscode', '*.egg-info'
+})
+
+# Upper bound on characters of source read for a single analysis request
+MAX_CODEBASE_CHARS = 180_000
+
+# File extensions recognized in colon/direct filename fences
+CODE_BLOCK_EXTENSIONS = frozenset({
+    'ts', 'tsx', 'js', 'jsx', 'py', 'css', 'html', 'json', 'md', 'yml', 'yaml',
+    'toml', 'sh', 'txt'
+})
+
+# Syntax highlighting language for each file extension sent for analysis
+LANGUAGE_MAP = {
+    '.py': 'python', '.js': 'javascript', '.jsx': 'jsx', 
+    '.ts': 'typescript', '.tsx': 'tsx', '.css': 'css',
+    '.html': 'html', '.json': 'json', '.md': 'markdown',
+    '.yml': 'yaml', '.yaml': 'yaml', '.toml': 'toml',
+    '.sql': 'sql', '.graphql': 'graphql'
 }
 
 
-def get_api_key() -> Optional[str]:
-    """Get the V0 API key from environment variables or .env files."""
-    # Load from .env file in current directory
-    load_dotenv()
-    
-    # Try current directory .env first
-    current_dir_env = Path.cwd() / ".env"
-    if current_dir_env.exists():
-        load_dotenv(current_dir_env)
+@functools.lru_cache(maxsize=1)
+def load_api_key() -> tuple[Optional[str], Optional[Path]]:
+    """Resolve the V0 API key and the .env file that provided it.
+
+    Each .env file is parsed at most once and the result is memoized; call
+    ``load_api_key.cache_clear()`` after writing a new key so the next lookup
+    sees it. The source is None when the key came from the environment.
+    """
+    # Already exported (the usual CI/production case): no .env parsing needed
+    api_key = os.getenv("V0_API_KEY")
+    if api_key is not None:
+        return api_key, None
     
-    # Try global config in home directory
-    global_env = Path.home() / ".anvil" / ".env"
-    if global_env.exists():
-        load_dotenv(global_env)
+    # Current directory .env first, then the global config in ~/.anvil; stop
+    # at the first file that provides the key
+    for env_file in (Path.cwd() / ".env", Path.home() / ".anvil" / ".env"):
+        if env_file.exists():
+            # Read without exporting, so a key rewritten later in this process
+            # isn't shadowed by the stale value in os.environ
+            api_key = dotenv_values(env_file).get("V0_API_KEY")
+            if api_key is not None:
+                return api_key, env_file
     
-    # Finally check environment variable
-    return os.getenv("V0_API_KEY")
+    return None, None
+
+
+def get_api_key() -> Optional[str]:
+    """Get the V0 API key from environment variables or .env files."""
+    return load_api_key()[0]
+
+
+def upsert_env_var(env_file: Path, key: str, value: str) -> None:
+    """Set ``key=value`` in an .env file, replacing any existing assignment.
+
+    The file is read once and filtered in a single pass. The result goes to a
+    temporary file in the same directory, which is fsynced and then renamed
+    over the original, so a crash leaves either the old file or the new one.
+    A symlinked .env is followed, so its target is updated and the link is
+    kept. An existing file keeps its permissions; a new one is created
+    readable by its owner only (0600), since it holds secrets.
+    """
+    env_file = env_file.resolve()
+    try:
+        lines = env_file.read_text().splitlines(keepends=True)
+        mode: Optional[int] = env_file.stat().st_mode & 0o777
+    except FileNotFoundError:
+        lines = []
+        mode = None
+    
+    prefix = f'{key}='
+    lines = [line for line in lines if not line.lstrip().startswith(prefix)]
+    if lines and not lines[-1].endswith('\n'):
+        lines[-1] += '\n'
+    lines.append(f'{key}={value}\n')
+    
+    fd, tmp_name = tempfile.mkstemp(dir=env_file.parent, prefix=f'.{env_file.name}.')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            f.write(''.join(lines))
+            f.flush()
+            os.fsync(f.fileno())
+        if mode is not None:
+            # mkstemp creates the file owner-only; keep the original permissions
+            os.chmod(tmp_name, mode)
+        os.replace(tmp_name, env_file)
+    except BaseException:
+        os.unlink(tmp_name)
+        raise
+
+
+def write_api_key(env_file: Path, api_key: str) -> None:
+    """Write the API key to an .env file, replacing any existing entry."""
+    upsert_env_var(env_file, 'V0_API_KEY', api_key)
+    load_api_key.cache_clear()
 
 
 def save_api_key_globally(api_key: str) -> None:
@@ -63,23 +171,7 @@ def save_api_key_globally(api_key: str) -> None:
     config_dir.mkdir(exist_ok=True)
     
     env_file = config_dir / ".env"
-    
-    # Read existing content if file exists
-    existing_content = ""
-    if env_file.exists():
-        with open(env_file, 'r') as f:
-            lines = f.readlines()
-        
-        # Remove any existing V0_API_KEY lines
-        lines = [line for line in lines if not line.strip().startswith('V0_API_KEY=')]
-        existing_content = ''.join(lines)
-    
-    # Write back with new API key
-    with open(env_file, 'w') as f:
-        f.write(existing_content)
-        if existing_content and not existing_content.endswith('\n'):
-            f.write('\n')
-        f.write(f'V0_API_KEY={api_key}\n')
+    write_api_key(env_file, api_key)
     
     console.print(f"✅ API key saved to: {env_file}", style="green")
 
@@ -99,22 +191,7 @@ def config_cmd(
             # Save to current directory .env
             env_file = Path.cwd() / ".env"
             
-            # Read existing content if file exists
-            existing_content = ""
-            if env_file.exists():
-                with open(env_file, 'r') as f:
-                    lines = f.readlines()
-                
-                # Remove any existing V0_API_KEY lines
-                lines = [line for line in lines if not line.strip().startswith('V0_API_KEY=')]
-                existing_content = ''.join(lines)
-            
-            # Write back with new API key
-            with open(env_file, 'w') as f:
-                f.write(existing_content)
-                if existing_content and not existing_content.endswith('\n'):
-                    f.write('\n')
-                f.write(f'V0_API_KEY={set_key}\n')
+            write_api_key(env_file, set_key)
             
             console.print(f"✅ API key saved to: {env_file}", style="green")
             console.print("💡 Tip: Add .env to your .gitignore to keep your API key private", style="dim")
@@ -122,19 +199,16 @@ def config_cmd(
         return
     
     if show:
-        api_key = get_api_key()
+        api_key, source = load_api_key()
         if api_key:
             masked_key = api_key[:8] + "..." + api_key[-4:] if len(api_key) > 12 else "***"
             console.print(f"✅ API key found: {masked_key}", style="green")
             
             # Show where it's loaded from
-            current_dir_env = Path.cwd() / ".env"
-            global_env = Path.home() / ".anvil" / ".env"
-            
-            if current_dir_env.exists() and "V0_API_KEY" in current_dir_env.read_text():
-                console.print(f"📁 Loaded from: {current_dir_env}", style="dim")
-            elif global_env.exists() and "V0_API_KEY" in global_env.read_text():
-                console.print(f"🌍 Loaded from: {global_env}", style="dim")
+            if source == Path.cwd() / ".env":
+                console.print(f"📁 Loaded from: {source}", style="dim")
+            elif source is not None:
+                console.print(f"🌍 Loaded from: {source}", style="dim")
             else:
                 console.print("🌍 Loaded from environment variable", style="dim")
         else:
@@ -157,66 +231,90 @@ def config_cmd(
     console.print("  anvil sketch config --show", style="dim")
 
 
+def has_code_block_extension(name: str) -> bool:
+    """Check that a fence filename ends in a recognized ``.ext`` after a stem."""
+    dot = name.rfind('.')
+    return dot > 0 and name[dot + 1:] in CODE_BLOCK_EXTENSIONS
+
+
+def iter_fence_headers(content: str, start: int) -> Iterator[tuple[str, str, int]]:
+    """Yield the ways the fence info starting at ``start`` can be read.
+
+    Candidates are ``(language, filename, body_start)`` tuples in order of
+    precedence for the supported formats:
+    1. ```tsx file="app/page.tsx" (v0 format)
+    2. ```tsx:filename.tsx (colon format)
+    3. ```filename.tsx (direct filename)
+    """
+    line_end = content.find('\n', start)
+    
+    # Language: a run of word characters, as \w would match
+    lang_end = start
+    while lang_end < len(content) and (
+        content[lang_end].isalnum() or content[lang_end] == '_'
+    ):
+        lang_end += 1
+    language = content[start:lang_end]
+    
+    if language:
+        # v0 format: whitespace, then file="..." closing right before a newline
+        attr_start = lang_end
+        while attr_start < len(content) and content[attr_start].isspace():
+            attr_start += 1
+        if attr_start > lang_end and content.startswith('file="', attr_start):
+            name_start = attr_start + len('file="')
+            name_end = content.find('"', name_start)
+            if name_end > name_start and content.startswith('\n', name_end + 1):
+                yield language, content[name_start:name_end], name_end + 2
+        
+        # Colon format: the rest of the line is the filename
+        if line_end != -1 and content.startswith(':', lang_end):
+            filename = content[lang_end + 1:line_end]
+            if has_code_block_extension(filename):
+                yield language, filename, line_end + 1
+    
+    # Direct filename: the whole info line is the filename
+    if line_end != -1:
+        filename = content[start:line_end]
+        if has_code_block_extension(filename):
+            yield '', filename, line_end + 1
+
+
 def parse_code_blocks(content: str) -> Dict[str, str]:
-    """Parse code blocks from markdown content and extract filename and code."""
+    """Parse code blocks from markdown content and extract filename and code.
+
+    A single left-to-right scan with ``str.find``: each opening fence's info
+    line is read by iter_fence_headers, and the block runs to the next fence.
+    """
     files = {}
     
-    # Pattern to match code blocks with various filename formats:
-    # 1. ```tsx file="app/page.tsx" (v0 format)
-    # 2. ```tsx:filename.tsx (colon format)  
-    # 3. ```filename.tsx (direct filename)
-    pattern = r'```(?:(\w+)\s+file="([^"]+)"|(\w+):([^\n]+\.(tsx?|jsx?|py|css|html|json|md|yml|yaml|toml|sh|txt))|([^\n]+\.(tsx?|jsx?|py|css|html|json|md|yml|yaml|toml|sh|txt)))\n(.*?)```'
-    matches = re.findall(pattern, content, re.DOTALL)
-    
-    for match in matches:
-        language_v0, filename_v0, language_colon, filename_colon, ext_colon, filename_direct, ext_direct, code = match
+    pos = 0
+    while (fence := content.find('```', pos)) != -1:
+        for _, filename, body_start in iter_fence_headers(content, fence + 3):
+            body_end = content.find('```', body_start)
+            if body_end != -1:
+                break
+        else:
+            # Not a usable opening fence; keep scanning from the next character
+            pos = fence + 1
+            continue
         
-        # Handle v0 format: ```tsx file="app/page.tsx"
-        if language_v0 and filename_v0:
-            files[filename_v0] = code.strip()
-        # Handle colon format: ```tsx:filename.tsx
-        elif language_colon and filename_colon:
-            files[filename_colon] = code.strip()
-        # Handle direct filename: ```filename.tsx
-        elif filename_direct:
-            files[filename_direct] = code.strip()
-        # Handle language-only blocks (fallback to default names)
-        elif language_v0 and code.strip():
-            # Try to infer filename from language for language-only blocks
-            if language_v0 == "typescript" or language_v0 == "ts" or language_v0 == "tsx":
-                files["index.ts"] = code.strip()
-            elif language_v0 == "javascript" or language_v0 == "js" or language_v0 == "jsx":
-                files["index.js"] = code.strip()
-            elif language_v0 == "python" or language_v0 == "py":
-                files["main.py"] = code.strip()
-            elif language_v0 == "css":
-                files["styles.css"] = code.strip()
-            elif language_v0 == "html":
-                files["index.html"] = code.strip()
-            elif language_v0 == "json":
-                files["config.json"] = code.strip()
-            elif language_v0 == "markdown" or language_v0 == "md":
-                files["README.md"] = code.strip()
-        elif language_colon and code.strip():
-            # Try to infer filename from language for language-only blocks
-            if language_colon == "typescript" or language_colon == "ts" or language_colon == "tsx":
-                files["index.ts"] = code.strip()
-            elif language_colon == "javascript" or language_colon == "js" or language_colon == "jsx":
-                files["index.js"] = code.strip()
-            elif language_colon == "python" or language_colon == "py":
-                files["main.py"] = code.strip()
-            elif language_colon == "css":
-                files["styles.css"] = code.strip()
-            elif language_colon == "html":
-                files["index.html"] = code.strip()
-            elif language_colon == "json":
-                files["config.json"] = code.strip()
-            elif language_colon == "markdown" or language_colon == "md":
-                files["README.md"] = code.strip()
+        pos = body_end + 3
+        files[filename] = content[body_start:body_end].strip()
     
     return files
 
 
+def write_file(file_path: Path, content: str) -> Optional[Exception]:
+    """Write a single generated file, returning the error instead of raising."""
+    try:
+        with open(file_path, 'w', encoding='utf-8') as f:
+            f.write(content)
+    except Exception as e:
+        return e
+    return None
+
+
 def create_files(files: Dict[str, str], base_path: Path = Path.cwd()) -> None:
     """Create files from the parsed code blocks."""
     if not files:
@@ -225,22 +323,139 @@ def create_files(files: Dict[str, str], base_path: Path = Path.cwd()) -> None:
     
     console.print(f"\n📁 Creating {len(files)} file(s):", style="bold green")
     
-    for filename, content in files.items():
-        file_path = base_path / filename
-        
-        # Create parent directories if they don't exist
-        file_path.parent.mkdir(parents=True, exist_ok=True)
-        
+    file_paths = [base_path / filename for filename in files]
+    
+    # Create each parent directory once; a failure here surfaces as a write
+    # error for the affected files below
+    for parent in {file_path.parent for file_path in file_paths}:
         try:
-            with open(file_path, 'w', encoding='utf-8') as f:
-                f.write(content)
+            parent.mkdir(parents=True, exist_ok=True)
+        except OSError:
+            pass
+    
+    # Writes are I/O-bound, so overlap them; report results in order
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        errors = list(executor.map(write_file, file_paths, files.values()))
+    
+    for file_path, error in zip(file_paths, errors):
+        if error is None:
             console.print(f"  ✅ Created: {file_path}", style="green")
-        except Exception as e:
-            console.print(f"  ❌ Failed to create {file_path}: {e}", style="red")
+        else:
+            console.print(f"  ❌ Failed to create {file_path}: {error}", style="red")
+
+
+async def iter_sse_data(response: "httpx.Response") -> AsyncIterator[bytes]:
+    """Yield the payload of each ``data:`` line of a server-sent event stream.
+
+    Works on raw bytes so payloads go straight to the JSON parser without a
+    decode step. Iteration stops at the ``[DONE]`` sentinel.
+    """
+    buffer = bytearray()
+    async for chunk in response.aiter_bytes():
+        # Only the new bytes can hold a newline, so each byte is searched once
+        # however many chunks a long line spans
+        pos = len(buffer)
+        buffer += chunk
+        start = 0
+        while (end := buffer.find(b"\n", pos)) != -1:
+            line = bytes(buffer[start:end])
+            start = pos = end + 1
+            if line.startswith(SSE_DATA_PREFIX):
+                data = line[len(SSE_DATA_PREFIX):].strip()
+                if data == b"[DONE]":
+                    return
+                yield data
+        del buffer[:start]
+    
+    if buffer.startswith(SSE_DATA_PREFIX):
+        data = bytes(buffer[len(SSE_DATA_PREFIX):]).strip()
+        if data != b"[DONE]":
+            yield data
+
+
+# HTTP client shared by every request on the shared event loop, so later
+# commands reuse pooled connections instead of a fresh TCP + TLS handshake
+_http_client: Optional["httpx.AsyncClient"] = None
+
+
+def get_http_client() -> "httpx.AsyncClient":
+    """Return the shared HTTP client, creating it on first use."""
+    import httpx
+
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = httpx.AsyncClient()
+    return _http_client
+
+
+# Event loop shared by every command run in this process (e.g. from the REPL)
+_event_loop: Optional["asyncio.AbstractEventLoop"] = None
+
+
+def close_event_loop(loop: "asyncio.AbstractEventLoop") -> None:
+    """Finish pending cleanup work on a shared loop, then close it."""
+    import asyncio
+
+    try:
+        if _http_client is not None and not _http_client.is_closed:
+            loop.run_until_complete(_http_client.aclose())
+        # Async generators left suspended by an early break (e.g. the SSE
+        # line iterators) schedule their cleanup here; let it run
+        loop.run_until_complete(loop.shutdown_asyncgens())
+        pending = asyncio.all_tasks(loop)
+        if pending:
+            loop.run_until_complete(asyncio.gather(*pending, return_exceptions=True))
+    finally:
+        loop.close()
+
+
+def new_event_loop() -> "asyncio.AbstractEventLoop":
+    """Create an event loop, preferring uvloop (or winloop on Windows).
+
+    The SSE loop awaits many tiny reads, so the C-implemented loops' lower
+    per-await overhead adds up; fall back to asyncio's own loop otherwise.
+    """
+    import asyncio
+
+    try:
+        if sys.platform == "win32":
+            from winloop import new_event_loop as fast_event_loop
+        else:
+            from uvloop import new_event_loop as fast_event_loop
+    except ImportError:
+        return asyncio.new_event_loop()
+    loop: asyncio.AbstractEventLoop = fast_event_loop()
+    return loop
+
+
+def run_async(coro: Coroutine[Any, Any, T]) -> T:
+    """Run a coroutine to completion on the shared event loop.
+
+    Unlike asyncio.run, the loop is created once and reused, so repeated
+    commands don't pay for building and tearing down a new loop each time.
+    """
+    global _event_loop
+    if _event_loop is None or _event_loop.is_closed():
+        _event_loop = new_event_loop()
+        atexit.register(close_event_loop, _event_loop)
+
+    task = _event_loop.create_task(coro)
+    try:
+        return _event_loop.run_until_complete(task)
+    except BaseException:
+        # Let the interrupted task unwind so the loop stays reusable
+        task.cancel()
+        try:
+            _event_loop.run_until_complete(task)
+        except BaseException:
+            pass
+        raise
 
 
 async def stream_v0_response(prompt: str, api_key: str) -> str:
     """Stream response from v0 API and display it in real-time."""
+    import httpx
+
     headers = {
         "Authorization": f"Bearer {api_key}",
         "Content-Type": "application/json"
@@ -254,50 +469,47 @@ async def stream_v0_response(prompt: str, api_key: str) -> str:
         "stream": True
     }
     
-    full_response = ""
+    # Collect chunks and join once at the end so accumulation stays linear
+    chunks: list[str] = []
     
     try:
-        async with httpx.AsyncClient(timeout=60.0) as client:
-            console.print("🚀 Calling v0 API...", style="bold cyan")
-            console.print()
+        client = get_http_client()
+        console.print("🚀 Calling v0 API...", style="bold cyan")
+        console.print()
+        
+        async with client.stream("POST", V0_API_URL, json=payload, headers=headers, timeout=60.0) as response:
+            if response.status_code != 200:
+                error_text = await response.aread()
+                console.print(f"❌ API Error ({response.status_code}): {error_text.decode()}", style="red")
+                return ""
             
-            async with client.stream("POST", V0_API_URL, json=payload, headers=headers) as response:
-                if response.status_code != 200:
-                    error_text = await response.aread()
-                    console.print(f"❌ API Error ({response.status_code}): {error_text.decode()}", style="red")
-                    return ""
-                
-                # Create a live display for streaming
-                text_display = Text()
-                
-                with Live(Panel(text_display, title="🤖 v0 Response", border_style="cyan"), refresh_per_second=10) as live:
-                    async for line in response.aiter_lines():
-                        if line.startswith("data: "):
-                            data_str = line[6:]  # Remove "data: " prefix
+            # Create a live display for streaming
+            text_display = Text()
+            
+            # Rich re-renders the panel on its own refresh timer; appending
+            # to text_display mutates the renderable it is already tracking
+            panel = Panel(text_display, title="🤖 v0 Response", border_style="cyan")
+            with Live(panel, refresh_per_second=10, auto_refresh=True):
+                async for data_bytes in iter_sse_data(response):
+                    try:
+                        data = json_loads(data_bytes)
+                        choices = data.get("choices", [])
+                        
+                        if choices:
+                            delta = choices[0].get("delta", {})
+                            content = delta.get("content", "")
                             
-                            if data_str.strip() == "[DONE]":
-                                break
-                                
-                            try:
-                                data = json.loads(data_str)
-                                choices = data.get("choices", [])
+                            if content:
+                                chunks.append(content)
+                                text_display.append(content)
                                 
-                                if choices:
-                                    delta = choices[0].get("delta", {})
-                                    content = delta.get("content", "")
-                                    
-                                    if content:
-                                        full_response += content
-                                        text_display.append(content)
-                                        live.update(Panel(text_display, title="🤖 v0 Response", border_style="cyan"))
-                                        
-                            except json.JSONDecodeError:
-                                # Skip malformed JSON lines
-                                continue
-                            except Exception as e:
-                                console.print(f"⚠️  Error processing stream: {e}", style="yellow")
-                                continue
-    
+                    except json.JSONDecodeError:
+                        # Skip malformed JSON lines
+                        continue
+                    except Exception as e:
+                        console.print(f"⚠️  Error processing stream: {e}", style="yellow")
+                        continue
+
     except httpx.TimeoutException:
         console.print("⏱️  Request timed out. Please try again.", style="red")
     except httpx.RequestError as e:
@@ -305,7 +517,7 @@ async def stream_v0_response(prompt: str, api_key: str) -> str:
     except Exception as e:
         console.print(f"❌ Unexpected error: {e}", style="red")
     
-    return full_response
+    return "".join(chunks)
 
 
 @app.command(name="create")
@@ -331,11 +543,8 @@ def generate(prompt: str, no_files: bool = typer.Option(False, "--no-files", hel
     console.print(f"📂 Working directory: {Path.cwd()}", style="dim")
     console.print()
     
-    # Use asyncio to handle the streaming response
-    import asyncio
-    
     try:
-        response = asyncio.run(stream_v0_response(prompt, api_key))
+        response = run_async(stream_v0_response(prompt, api_key))
         
         if response:
             console.print("\n" + "="*50, style="dim")
@@ -361,88 +570,129 @@ def main() -> None:
     """Generate creative content from text prompts using v0 API."""
 
 
-def should_include_file(file_path: Path) -> bool:
-    """Check if a file should be included in the codebase analysis."""
-    # Check extension
-    if file_path.suffix.lower() not in INCLUDE_EXTENSIONS:
+def should_include_file(entry: os.DirEntry[str]) -> bool:
+    """Check if a file should be included in the codebase analysis.
+
+    Works on the ``os.DirEntry`` from the directory scan so the type check and
+    size gate reuse its cached stat data instead of issuing new syscalls.
+    """
+    # Check extension first, before any stat call; excluded directories are
+    # pruned during the walk so no parent check is needed
+    if os.path.splitext(entry.name)[1].lower() not in INCLUDE_EXTENSIONS:
         return False
     
-    # Check if any parent directory should be excluded
-    for part in file_path.parts:
-        if part in EXCLUDE_DIRS:
-            return False
-    
     # Check file size (skip very large files)
     try:
-        if file_path.stat().st_size > 100_000:  # 100KB limit
+        if not entry.is_file(follow_symlinks=False):
             return False
-    except (OSError, FileNotFoundError):
+        size = entry.stat(follow_symlinks=False).st_size
+        if size == 0 or size > 100_000:  # skip empty files and anything over 100KB
+            return False
+    except OSError:
         return False
     
     return True
 
 
-def read_codebase(base_path: Path) -> Dict[str, str]:
-    """Read all relevant files in the codebase."""
+def iter_codebase_files(base_path: Path) -> Iterator[os.DirEntry[str]]:
+    """Yield the files under base_path that should be analyzed.
+
+    Directories are scanned breadth-first, so shallower (usually more central)
+    files come first. Excluded directories are pruned during the scan, so their
+    subtrees are never visited.
+    """
+    pending = deque([os.fspath(base_path)])
+    while pending:
+        try:
+            with os.scandir(pending.popleft()) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        if entry.name not in EXCLUDE_DIRS:
+                            pending.append(entry.path)
+                    elif should_include_file(entry):
+                        yield entry
+        except OSError:
+            # Skip directories that can't be listed
+            continue
+
+
+def read_codebase(base_path: Path, max_chars: int = MAX_CODEBASE_CHARS) -> Dict[str, str]:
+    """Read all relevant files in the codebase.
+
+    Reading stops once the files read so far would exceed ``max_chars``, since
+    anything past that would be truncated by the API anyway.
+    """
     codebase = {}
+    total_chars = 0
+    # Every entry path is the base path joined with more components, so the
+    # relative path is a plain slice; no relpath normalization per file
+    prefix_len = len(os.path.join(os.fspath(base_path), ''))
     
     try:
-        for file_path in base_path.rglob('*'):
-            if file_path.is_file() and should_include_file(file_path):
-                try:
-                    # Get relative path from base
-                    relative_path = file_path.relative_to(base_path)
-                    
-                    # Read file content
-                    with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                        content = f.read()
-                    
-                    codebase[str(relative_path)] = content
-                    
-                except (UnicodeDecodeError, PermissionError, OSError):
-                    # Skip files that can't be read
-                    continue
-                    
+        for entry in iter_codebase_files(base_path):
+            try:
+                # Get relative path from base
+                relative_path = entry.path[prefix_len:]
+                
+                # Read file content, sniffing the first block for NUL bytes so
+                # binary files are skipped before the rest is read
+                with open(entry.path, 'rb') as f:
+                    head = f.read(8192)
+                    if b'\x00' in head:
+                        continue
+                    data = head + f.read()
+                
+                content = data.decode('utf-8', errors='replace')
+                if total_chars + len(content) > max_chars:
+                    console.print(f"⚠️  Large codebase detected (over {max_chars:,} characters)", style="yellow")
+                    console.print("   Remaining files were skipped. Consider analyzing specific subdirectories.", style="dim")
+                    break
+                
+                total_chars += len(content)
+                codebase[relative_path] = content
+                
+            except (UnicodeDecodeError, PermissionError, OSError):
+                # Skip files that can't be read
+                continue
+                
     except Exception as e:
         console.print(f"⚠️  Error reading codebase: {e}", style="yellow")
     
     return codebase
 
 
-def format_codebase_for_api(codebase: Dict[str, str]) -> str:
-    """Format the codebase data for sending to the v0 API."""
-    formatted = "# Codebase Analysis\n\n"
-    formatted += "Please analyze this codebase and offer improvements, suggestions, and best practices.\n\n"
-    
-    # Add file structure overview
-    formatted += "## File Structure\n\n"
-    sorted_files = sorted(codebase.keys())
-    for file_path in sorted_files:
-        formatted += f"- {file_path}\n"
+def format_codebase_for_api(codebase: Dict[str, str]) -> list[Dict[str, str]]:
+    """Format the codebase data as chat messages for the v0 API.
+
+    The instructions and file structure go in a system message and the file
+    contents in a user message, one fenced block per file.
+    """
+    sorted_files = sorted(codebase.items())
     
-    formatted += "\n## File Contents\n\n"
+    overview = "\n".join(f"- {file_path}" for file_path, _ in sorted_files)
+    instructions = (
+        "# Codebase Analysis\n\n"
+        "Please analyze this codebase and offer improvements, suggestions, and best practices.\n\n"
+        f"## File Structure\n\n{overview}\n"
+    )
     
-    # Add each file's content
-    for file_path, content in sorted(codebase.items()):
+    blocks = []
+    for file_path, content in sorted_files:
         # Determine language for syntax highlighting
-        extension = Path(file_path).suffix.lower()
-        language_map = {
-            '.py': 'python', '.js': 'javascript', '.jsx': 'jsx', 
-            '.ts': 'typescript', '.tsx': 'tsx', '.css': 'css',
-            '.html': 'html', '.json': 'json', '.md': 'markdown',
-            '.yml': 'yaml', '.yaml': 'yaml', '.toml': 'toml',
-            '.sql': 'sql', '.graphql': 'graphql'
-        }
-        language = language_map.get(extension, 'text')
-        
-        formatted += f"### {file_path}\n\n"
-        formatted += f"```{language}\n{content}\n```\n\n"
+        extension = os.path.splitext(file_path)[1].lower()
+        language = LANGUAGE_MAP.get(extension, 'text')
+        blocks.append(f"### {file_path}\n\n```{language}\n{content}\n```\n")
     
-    return formatted
+    return [
+        {"role": "system", "content": instructions},
+        {"role": "user", "content": "## File Contents\n\n" + "\n".join(blocks)},
+    ]
 
 
-async def analyze_codebase_with_v0(codebase_content: str, api_key: str) -> str:
-    """Send codebase to v0 API for analysis."""
+async def analyze_codebase_with_v0(messages: list[Dict[str, str]], api_key: str) -> str:
+    """Send codebase messages to v0 API for analysis."""
+    import httpx
+
     headers = {
         "Authorization": f"Bearer {api_key}",
         "Content-Type": "application/json"
@@ -450,56 +700,53 @@ async def analyze_codebase_with_v0(codebase_content: str, api_key: str) -> str:
     
     payload = {
         "model": "v0-1.0-md",
-        "messages": [
-            {"role": "user", "content": codebase_content}
-        ],
+        "messages": messages,
         "stream": True
     }
     
-    full_response = ""
+    # Collect chunks and join once at the end so accumulation stays linear
+    chunks: list[str] = []
     
     try:
-        async with httpx.AsyncClient(timeout=120.0) as client:  # Longer timeout for analysis
-            console.print("🔍 Sending codebase to v0 for analysis...", style="bold cyan")
-            console.print()
+        client = get_http_client()
+        console.print("🔍 Sending codebase to v0 for analysis...", style="bold cyan")
+        console.print()
+        
+        # The payload is mostly file contents; serialize it in one pass
+        body = json_dumps(payload)
+        async with client.stream("POST", V0_API_URL, content=body, headers=headers, timeout=120.0) as response:  # Longer timeout for analysis
+            if response.status_code != 200:
+                error_text = await response.aread()
+                console.print(f"❌ API Error ({response.status_code}): {error_text.decode()}", style="red")
+                return ""
             
-            async with client.stream("POST", V0_API_URL, json=payload, headers=headers) as response:
-                if response.status_code != 200:
-                    error_text = await response.aread()
-                    console.print(f"❌ API Error ({response.status_code}): {error_text.decode()}", style="red")
-                    return ""
-                
-                # Create a live display for streaming
-                text_display = Text()
-                
-                with Live(Panel(text_display, title="🩺 v0 Codebase Analysis", border_style="cyan"), refresh_per_second=8) as live:
-                    async for line in response.aiter_lines():
-                        if line.startswith("data: "):
-                            data_str = line[6:]  # Remove "data: " prefix
+            # Create a live display for streaming
+            text_display = Text()
+            
+            # Rich re-renders the panel on its own refresh timer; appending
+            # to text_display mutates the renderable it is already tracking
+            panel = Panel(text_display, title="🩺 v0 Codebase Analysis", border_style="cyan")
+            with Live(panel, refresh_per_second=8, auto_refresh=True):
+                async for data_bytes in iter_sse_data(response):
+                    try:
+                        data = json_loads(data_bytes)
+                        choices = data.get("choices", [])
+                        
+                        if choices:
+                            delta = choices[0].get("delta", {})
+                            content = delta.get("content", "")
                             
-                            if data_str.strip() == "[DONE]":
-                                break
+                            if content:
+                                chunks.append(content)
+                                text_display.append(content)
                                 
-                            try:
-                                data = json.loads(data_str)
-                                choices = data.get("choices", [])
-                                
-                                if choices:
-                                    delta = choices[0].get("delta", {})
-                                    content = delta.get("content", "")
-                                    
-                                    if content:
-                                        full_response += content
-                                        text_display.append(content)
-                                        live.update(Panel(text_display, title="🩺 v0 Codebase Analysis", border_style="cyan"))
-                                        
-                            except json.JSONDecodeError:
-                                # Skip malformed JSON lines
-                                continue
-                            except Exception as e:
-                                console.print(f"⚠️  Error processing stream: {e}", style="yellow")
-                                continue
-    
+                    except json.JSONDecodeError:
+                        # Skip malformed JSON lines
+                        continue
+                    except Exception as e:
+                        console.print(f"⚠️  Error processing stream: {e}", style="yellow")
+                        continue
+
     except httpx.TimeoutException:
         console.print("⏱️  Request timed out. Your codebase might be too large.", style="red")
     except httpx.RequestError as e:
@@ -507,7 +754,7 @@ async def analyze_codebase_with_v0(codebase_content: str, api_key: str) -> str:
     except Exception as e:
         console.print(f"❌ Unexpected error: {e}", style="red")
     
-    return full_response
+    return "".join(chunks)
 
 
 @app.command(name="doctor")
@@ -559,21 +806,13 @@ def doctor(
     
     console.print(f"✅ Found {len(codebase)} files to analyze", style="green")
     
-    # Check total size
-    total_chars = sum(len(content) for content in codebase.values())
-    if total_chars > 50_000:  # Rough token limit
-        console.print(f"⚠️  Large codebase detected ({total_chars:,} characters)", style="yellow")
-        console.print("   Analysis may be truncated. Consider analyzing specific subdirectories.", style="dim")
-    
     # Format for API
     console.print("📝 Formatting codebase for analysis...", style="cyan")
-    formatted_content = format_codebase_for_api(codebase)
+    messages = format_codebase_for_api(codebase)
     
     # Analyze with v0
-    import asyncio
-    
     try:
-        response = asyncio.run(analyze_codebase_with_v0(formatted_content, api_key))
+        response = run_async(analyze_codebase_with_v0(messages, api_key))
         
         if response:
             console.print("\n" + "="*60, style="dim")
@@ -1,19 +1,58 @@
 """Interactive REPL for anvil-cli."""
 
+import functools
+import os
 import shlex
 import sys
 from pathlib import Path
+from typing import TYPE_CHECKING, Callable
 
-from rich.console import Console
-from rich.panel import Panel
-from rich.text import Text
-from typer.testing import CliRunner
+# Rich (and click) are imported inside the functions that use them, so
+# importing this module stays cheap until something is actually shown
+if TYPE_CHECKING:
+    import typer
+    from rich.console import Console
+    from rich.text import Text
 
-console = Console()
+# Command history shared across REPL sessions
+HISTORY_FILE = Path.home() / ".anvil" / "history"
+HISTORY_LENGTH = 1000
 
+# Commands containing this flag carry the API key and are never saved
+HISTORY_SECRET_FLAG = "--set-key"
+
+# The interpreter version can't change while the REPL runs
+PYTHON_VERSION = sys.version.split()[0]
+
+
+@functools.lru_cache(maxsize=1)
+def get_console() -> "Console":
+    """Return the console shared by the REPL, creating it on first use."""
+    from rich.console import Console
+
+    return Console()
+
+
+@functools.lru_cache(maxsize=1)
+def get_app() -> "typer.Typer":
+    """Return the CLI app, resolved on the first command.
+
+    cli imports this module, so the app can't be imported at module level.
+    """
+    from .cli import app
+
+    return app
+
+
+@functools.lru_cache(maxsize=1)
+def build_welcome() -> tuple["Text", "Text"]:
+    """Build the static parts of the welcome screen: the banner text and tip.
+
+    Only the cwd line changes between calls, so the large banner is built once
+    and reused.
+    """
+    from rich.text import Text
 
-def show_welcome() -> None:
-    """Display the welcome panel and tip."""
     # Create welcome message
     welcome_text = Text()
     welcome_text.append("""
@@ -47,6 +86,23 @@ def show_welcome() -> None:
   • Get colour pallets from images
 
 """)
+
+    # Tip line shown under the panel
+    tip = Text(
+        "* Tip: Start with small features or bug fixes, ask Anvil to propose a plan, "
+        "and verify its suggested edits *",
+        style="dim"
+    )
+    return welcome_text, tip
+
+
+def show_welcome() -> None:
+    """Display the welcome panel and tip."""
+    from rich.panel import Panel
+
+    console = get_console()
+    banner, tip = build_welcome()
+    welcome_text = banner.copy()
     welcome_text.append(f"cwd: {Path.cwd()}")
 
     # Display yellow-bordered panel
@@ -58,51 +114,68 @@ def show_welcome() -> None:
     console.print(panel)
 
     # Display tip line
-    tip = Text(
-        "* Tip: Start with small features or bug fixes, ask Anvil to propose a plan, "
-        "and verify its suggested edits *",
-        style="dim"
-    )
     console.print(tip)
     console.print()
 
 
-def show_help() -> None:
-    """Display available slash commands."""
-    help_text = Text()
-    help_text.append("Available slash commands:\n", style="bold")
-    help_text.append("  /help, ?     - Show this help message\n")
-    help_text.append(
+@functools.lru_cache(maxsize=1)
+def build_help() -> "Text":
+    """Build the slash command help, which never changes."""
+    from rich.text import Text
+
+    return Text.assemble(
+        ("Available slash commands:\n", "bold"),
+        "  /help, ?     - Show this help message\n"
         "  /status      - Show current working directory and Python version\n"
+        "  /exit, /quit - Exit the REPL\n\n",
+        ("Anything else will be forwarded to the normal anvil CLI", "dim"),
     )
-    help_text.append("  /exit, /quit - Exit the REPL\n\n")
-    help_text.append(
-        "Anything else will be forwarded to the normal anvil CLI", style="dim"
-    )
-    console.print(help_text)
+
+
+@functools.lru_cache(maxsize=1)
+def build_status_header() -> "Text":
+    """Build the static heading of the status display."""
+    from rich.text import Text
+
+    return Text.assemble(("Current Status:\n", "bold cyan"))
+
+
+def show_help() -> None:
+    """Display available slash commands."""
+    get_console().print(build_help())
 
 
 def show_status() -> None:
     """Display current status information."""
-    status_text = Text()
-    status_text.append("Current Status:\n", style="bold cyan")
+    status_text = build_status_header().copy()
     status_text.append(f"  Working Directory: {Path.cwd()}\n")
-    status_text.append(f"  Python Version: {sys.version.split()[0]}\n")
-    console.print(status_text)
+    status_text.append(f"  Python Version: {PYTHON_VERSION}\n")
+    get_console().print(status_text)
+
+
+# Slash commands handled by the REPL itself
+SLASH_COMMANDS: dict[str, Callable[[], None]] = {
+    "/help": show_help,
+    "?": show_help,
+    "/status": show_status,
+}
+EXIT_COMMANDS = frozenset({"/exit", "/quit"})
 
 
 def execute_anvil_command(args: list[str]) -> None:
     """Execute an anvil command in-process."""
-    from .cli import app
+    import click
 
+    console = get_console()
     try:
-        # Use typer's testing functionality to run commands in-process
-        runner = CliRunner(mix_stderr=False)
-        result = runner.invoke(app, args, catch_exceptions=False)
-        if result.stdout:
-            console.print(result.stdout, end="")
-        if result.stderr:
-            console.print(result.stderr, end="", style="red")
+        # Run the command directly so its output goes straight to the
+        # terminal; standalone_mode=False returns instead of exiting
+        get_app()(args, prog_name="anvil", standalone_mode=False)
+    except click.ClickException as e:
+        # Usage errors and the like, printed the way the CLI would
+        e.show()
+    except click.Abort:
+        console.print("Aborted!", style="red")
     except SystemExit:
         # Ignore SystemExit to keep REPL running
         pass
@@ -110,33 +183,102 @@ def execute_anvil_command(args: list[str]) -> None:
         console.print(f"Error executing command: {e}", style="red")
 
 
+def split_command(line: str) -> list[str]:
+    """Split a REPL line into arguments like a POSIX shell would.
+
+    Lines without quotes or backslashes (most commands) split identically on
+    whitespace, so shlex's tokenizer only runs when quoting is involved.
+
+    Raises:
+        ValueError: If the line has unbalanced quotes
+    """
+    if '"' in line or "'" in line or "\\" in line:
+        return shlex.split(line)
+    return line.split()
+
+
+def load_history() -> int:
+    """Enable readline line editing and load the saved command history.
+
+    Returns:
+        Number of history entries loaded, or -1 if readline is unavailable
+    """
+    try:
+        import readline
+    except ImportError:
+        # Not available on Windows; input() still works without it
+        return -1
+
+    readline.set_history_length(HISTORY_LENGTH)
+    try:
+        readline.read_history_file(HISTORY_FILE)
+    except OSError:
+        pass
+    return int(readline.get_current_history_length())
+
+
+def save_history(loaded: int) -> None:
+    """Append the commands entered this session to the history file.
+
+    Commands that set the API key are dropped first, and the file is kept
+    readable by its owner only.
+    """
+    import readline
+
+    # Indexes are 0-based for remove_history_item but 1-based for
+    # get_history_item; walk backwards so removals don't shift what's left
+    for index in reversed(range(loaded, readline.get_current_history_length())):
+        if HISTORY_SECRET_FLAG in (readline.get_history_item(index + 1) or ""):
+            readline.remove_history_item(index)
+
+    new_entries = readline.get_current_history_length() - loaded
+    if new_entries <= 0:
+        return
+    try:
+        HISTORY_FILE.parent.mkdir(parents=True, exist_ok=True)
+        os.close(os.open(HISTORY_FILE, os.O_WRONLY | os.O_CREAT, 0o600))
+        # Also tighten files created before the mode was set
+        os.chmod(HISTORY_FILE, 0o600)
+        readline.append_history_file(new_entries, HISTORY_FILE)
+    except OSError:
+        pass
+
+
 def repl() -> None:
     """Main REPL loop."""
+    console = get_console()
+    history_loaded = load_history()
+
+    # The prompt goes through input() so readline knows where the line starts;
+    # \001/\002 mark the color codes as zero-width for readline
+    if console.is_terminal and not console.no_color:
+        if history_loaded >= 0:
+            prompt = "\001\x1b[1;36m\002> \001\x1b[0m\002"
+        else:
+            prompt = "\x1b[1;36m> \x1b[0m"
+    else:
+        prompt = "> "
+
     show_welcome()
 
     try:
         while True:
             try:
-                # Prompt for input
-                prompt_text = Text("> ", style="bold cyan")
-                console.print(prompt_text, end="")
-
-                user_input = input().strip()
+                user_input = input(prompt).strip()
 
                 if not user_input:
                     continue
 
                 # Handle slash commands
-                if user_input in ("/help", "?"):
-                    show_help()
-                elif user_input == "/status":
-                    show_status()
-                elif user_input in ("/exit", "/quit"):
+                if user_input in EXIT_COMMANDS:
                     break
+                handler = SLASH_COMMANDS.get(user_input)
+                if handler is not None:
+                    handler()
                 else:
                     # Parse and execute as anvil command
                     try:
-                        args = shlex.split(user_input)
+                        args = split_command(user_input)
                         if args:
                             execute_anvil_command(args)
                     except ValueError as e:
@@ -151,6 +293,8 @@ def repl() -> None:
                 break
 
     finally:
+        if history_loaded >= 0:
+            save_history(history_loaded)
         console.print("Bye - thanks for forging with Anvil!", style="dim")
 
 
@@ -5,6 +5,7 @@ This simulates the v0 API response for educational purposes.
 """
 
 import os
+import sys
 import time
 from pathlib import Path
 
@@ -217,9 +218,20 @@ def simulate_streaming_output():
     print("🤖 v0 Response:")
     print("┌" + "─" * 50 + "┐")
     
-    # Simulate streaming by printing chunks with delays
-    for chunk in SAMPLE_RESPONSE.split():
-        print(chunk, end=" ", flush=True)
+    # Simulate streaming by writing the response a line at a time. The chunks
+    # are encoded up front and written straight to the byte buffer, with one
+    # write and flush per line rather than per word.
+    encoding = sys.stdout.encoding or "utf-8"
+    chunks = [
+        (" ".join(words) + " ").encode(encoding, errors="replace")
+        for words in map(str.split, SAMPLE_RESPONSE.splitlines())
+        if words
+    ]
+    sys.stdout.flush()  # text printed above must come out before the raw bytes
+    out = sys.stdout.buffer
+    for chunk in chunks:
+        out.write(chunk)
+        out.flush()
         time.sleep(0.05)  # Small delay to simulate streaming
     
     print()
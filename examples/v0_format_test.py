@@ -3,8 +3,7 @@
 Test script to verify that anvil can parse v0's file format correctly.
 """
 
-import re
-from typing import Dict
+from typing import Dict, Optional
 
 # Sample v0 response with the file="filename" format
 V0_RESPONSE = '''
@@ -135,29 +134,52 @@ body {
 ```
 '''
 
+_CODE_EXTENSIONS = frozenset({
+    'ts', 'tsx', 'js', 'jsx', 'py', 'css', 'html', 'json', 'md', 'yml', 'yaml',
+    'toml', 'sh', 'txt'
+})
+
+def parse_fence_filename(header: str) -> Optional[str]:
+    """Get the filename from a fence info string, if it names one.
+
+    Supported formats:
+    1. ```tsx file="app/page.tsx" (v0 format)
+    2. ```tsx:filename.tsx (colon format)
+    3. ```filename.tsx (direct filename)
+    """
+    header = header.strip()
+    if ' file="' in header:
+        return header.split('file="', 1)[1].rstrip('"') or None
+    
+    name = header.split(':', 1)[1] if ':' in header else header
+    stem, dot, ext = name.rpartition('.')
+    return name if dot and stem and ext in _CODE_EXTENSIONS else None
+
 def parse_code_blocks(content: str) -> Dict[str, str]:
-    """Parse code blocks from markdown content and extract filename and code."""
+    """Parse code blocks from markdown content and extract filename and code.
+
+    A single pass over the lines: a line starting with ``` opens a block (the
+    rest of the line is its info string) and the next such line closes it.
+    """
     files = {}
+    lines = content.split('\n')
+    last = len(lines) - 1
+    filename = None
+    body = None  # lines of the open block, or None outside a block
     
-    # Pattern to match code blocks with various filename formats:
-    # 1. ```tsx file="app/page.tsx" (v0 format)
-    # 2. ```tsx:filename.tsx (colon format)  
-    # 3. ```filename.tsx (direct filename)
-    pattern = r'```(?:(\w+)\s+file="([^"]+)"|(\w+):([^\n]+\.(tsx?|jsx?|py|css|html|json|md|yml|yaml|toml|sh|txt))|([^\n]+\.(tsx?|jsx?|py|css|html|json|md|yml|yaml|toml|sh|txt)))\n(.*?)```'
-    matches = re.findall(pattern, content, re.DOTALL)
-    
-    for match in matches:
-        language_v0, filename_v0, language_colon, filename_colon, ext_colon, filename_direct, ext_direct, code = match
-        
-        # Handle v0 format: ```tsx file="app/page.tsx"
-        if language_v0 and filename_v0:
-            files[filename_v0] = code.strip()
-        # Handle colon format: ```tsx:filename.tsx
-        elif language_colon and filename_colon:
-            files[filename_colon] = code.strip()
-        # Handle direct filename: ```filename.tsx
-        elif filename_direct:
-            files[filename_direct] = code.strip()
+    for i, line in enumerate(lines):
+        if not line.startswith('```'):
+            if body is not None:
+                body.append(line)
+        elif body is None:
+            # An opening fence needs a newline after its info string
+            if i < last:
+                filename = parse_fence_filename(line[3:])
+                body = []
+        else:
+            if filename:
+                files[filename] = '\n'.join(body).strip()
+            body = None
     
     return files
 
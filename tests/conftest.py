@@ -0,0 +1,50 @@
+"""Shared pytest fixtures."""
+
+from typing import Callable
+
+import click
+import pytest
+import typer
+
+RunApp = Callable[[typer.Typer, list[str]], tuple[str, int]]
+
+
+@pytest.fixture(scope="session")
+def plugin_app() -> typer.Typer:
+    """A throwaway app with every discoverable plugin registered once.
+
+    Discovery runs a single time per session against this app instead of the
+    real CLI app, which is left untouched.
+    """
+    from anvil import cli
+
+    test_app = typer.Typer()
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        monkeypatch.setattr(cli, "app", test_app)
+        monkeypatch.setattr(cli, "_plugins_registered", False)
+        cli.discover_and_register_plugins()
+    return test_app
+
+
+@pytest.fixture
+def run_app(capsys: pytest.CaptureFixture[str]) -> RunApp:
+    """Run a Typer app in-process and return its stdout and exit code.
+
+    A lighter alternative to CliRunner.invoke for tests that only look at
+    stdout: the app is called directly with standalone_mode=False, and output
+    is captured by capsys.
+    """
+
+    def run(app: typer.Typer, args: list[str]) -> tuple[str, int]:
+        capsys.readouterr()  # drop anything printed before the call
+        try:
+            result = app(args, prog_name="anvil", standalone_mode=False)
+            code = result if isinstance(result, int) else 0
+        except click.ClickException as e:
+            e.show()
+            code = e.exit_code
+        except click.Abort:
+            code = 1
+        return capsys.readouterr().out, code
+
+    return run
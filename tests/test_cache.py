@@ -1,67 +1,197 @@
 """Tests for the cache module."""
 
-import tempfile
+import gc
+import sqlite3
+import weakref
 from pathlib import Path
+from typing import Iterator
 from unittest.mock import patch
 
+import pytest
+
 from anvil.cache import Cache
 
 
+def set_home(monkeypatch: pytest.MonkeyPatch, home: Path) -> None:
+    """Point Path.home() at ``home`` through the environment."""
+    monkeypatch.setenv("HOME", str(home))
+    monkeypatch.setenv("USERPROFILE", str(home))  # Path.home() on Windows
+
+
+@pytest.fixture
+def home(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    """A temporary home directory for a single test."""
+    set_home(monkeypatch, tmp_path)
+    return tmp_path
+
+
+@pytest.fixture(scope="module")
+def shared_cache(tmp_path_factory: pytest.TempPathFactory) -> Iterator[Cache]:
+    """One cache database for the whole module, so tests don't each create one."""
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        set_home(monkeypatch, tmp_path_factory.mktemp("home"))
+        cache = Cache()
+    yield cache
+    cache.close()
+
+
+@pytest.fixture
+def cache(shared_cache: Cache) -> Cache:
+    """The shared cache, emptied before each test."""
+    shared_cache.clear()
+    return shared_cache
+
+
 class TestCache:
     """Test cases for the Cache class."""
 
-    def test_cache_init(self) -> None:
+    def test_cache_init(self, home: Path) -> None:
         """Test cache initialization."""
-        with tempfile.TemporaryDirectory() as temp_dir:
-            with patch("anvil.cache.Path.home", return_value=Path(temp_dir)):
-                cache = Cache()
-                assert cache.cache_dir.exists()
-                assert cache.db_path.exists()
-
-    def test_cache_set_and_get(self) -> None:
+        cache = Cache()
+        assert cache.cache_dir == home / ".cache" / "anvil"
+        assert cache.cache_dir.exists()
+        assert cache.db_path.exists()
+        cache.close()
+
+    def test_cache_migrates_legacy_table(self, home: Path) -> None:
+        """Test that a legacy cache table is rebuilt without losing data."""
+        db_dir = home / ".cache" / "anvil"
+        db_dir.mkdir(parents=True)
+        with sqlite3.connect(db_dir / "cache.db") as conn:
+            conn.execute(
+                "CREATE TABLE cache (key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+                "created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)"
+            )
+            conn.execute("INSERT INTO cache (key, value) VALUES ('old', 'kept')")
+        conn.close()
+
+        cache = Cache()
+        assert cache.get("old") == "kept"
+        cache.close()
+
+        with sqlite3.connect(db_dir / "cache.db") as conn:
+            (sql,) = conn.execute(
+                "SELECT sql FROM sqlite_master WHERE name = 'cache'"
+            ).fetchone()
+            (created_at,) = conn.execute("SELECT created_at FROM cache").fetchone()
+        conn.close()
+        assert "WITHOUT ROWID" in sql
+        assert isinstance(created_at, int)
+
+    def test_cache_migration_runs_once(self, home: Path) -> None:
+        """Test that a second migration attempt leaves converted rows alone."""
+        db_dir = home / ".cache" / "anvil"
+        db_dir.mkdir(parents=True)
+        with sqlite3.connect(db_dir / "cache.db") as conn:
+            conn.execute(
+                "CREATE TABLE cache (key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+                "created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)"
+            )
+            conn.execute(
+                "INSERT INTO cache (key, value, created_at) "
+                "VALUES ('old', 'kept', '2024-01-01 00:00:00')"
+            )
+        conn.close()
+
+        cache = Cache()
+        # What a second process that saw the legacy table would run
+        cache._migrate_schema()
+        (created_at,) = cache._conn.execute("SELECT created_at FROM cache").fetchone()
+        cache.close()
+
+        assert created_at == 1704067200
+
+    def test_cache_set_and_get(self, cache: Cache) -> None:
         """Test setting and getting cache values."""
-        with tempfile.TemporaryDirectory() as temp_dir:
-            with patch("anvil.cache.Path.home", return_value=Path(temp_dir)):
-                cache = Cache()
+        # Test set and get
+        cache.set("test_key", "test_value")
+        assert cache.get("test_key") == "test_value"
 
-                # Test set and get
-                cache.set("test_key", "test_value")
-                assert cache.get("test_key") == "test_value"
+        # Test non-existent key
+        assert cache.get("non_existent") is None
 
-                # Test non-existent key
-                assert cache.get("non_existent") is None
-
-    def test_cache_update(self) -> None:
+    def test_cache_update(self, cache: Cache) -> None:
         """Test updating existing cache values."""
-        with tempfile.TemporaryDirectory() as temp_dir:
-            with patch("anvil.cache.Path.home", return_value=Path(temp_dir)):
-                cache = Cache()
+        # Set initial value
+        cache.set("test_key", "initial_value")
+        assert cache.get("test_key") == "initial_value"
 
-                # Set initial value
-                cache.set("test_key", "initial_value")
-                assert cache.get("test_key") == "initial_value"
+        # Update value
+        cache.set("test_key", "updated_value")
+        assert cache.get("test_key") == "updated_value"
 
-                # Update value
-                cache.set("test_key", "updated_value")
-                assert cache.get("test_key") == "updated_value"
+    def test_cache_reuses_connection(self, cache: Cache) -> None:
+        """Test that operations reuse the connection opened in __init__."""
+        with patch("anvil.cache.sqlite3.connect") as mock_connect:
+            cache.set("key", "value")
+            cache._mem.clear()  # force the next get to go to SQLite
+            assert cache.get("key") == "value"
+            cache.clear()
 
-    def test_cache_clear(self) -> None:
-        """Test clearing all cache data."""
-        with tempfile.TemporaryDirectory() as temp_dir:
-            with patch("anvil.cache.Path.home", return_value=Path(temp_dir)):
-                cache = Cache()
+        mock_connect.assert_not_called()
 
-                # Add some data
-                cache.set("key1", "value1")
-                cache.set("key2", "value2")
+    def test_cache_set_many(self, cache: Cache) -> None:
+        """Test setting several values in one batch."""
+        cache.set("key1", "old_value")
 
-                # Verify data exists
-                assert cache.get("key1") == "value1"
-                assert cache.get("key2") == "value2"
+        cache.set_many([("key1", "value1"), ("key2", "value2")])
 
-                # Clear cache
-                cache.clear()
+        assert cache.get("key1") == "value1"
+        assert cache.get("key2") == "value2"
 
-                # Verify data is gone
-                assert cache.get("key1") is None
-                assert cache.get("key2") is None
+    def test_cache_memory_layer(self, cache: Cache) -> None:
+        """Test that hot keys are served from memory and evicted when full."""
+        with patch("anvil.cache._MEMORY_CACHE_SIZE", 2):
+            cache.set_many([("key1", "value1"), ("key2", "value2")])
+            cache.set("key3", "value3")
+
+            # key1 was evicted from memory but is still in SQLite
+            assert "key1" not in cache._mem
+            assert cache.get("key1") == "value1"
+            assert list(cache._mem) == ["key3", "key1"]
+
+    def test_cache_clear(self, cache: Cache) -> None:
+        """Test clearing all cache data."""
+        # Add some data
+        cache.set("key1", "value1")
+        cache.set("key2", "value2")
+
+        # Verify data exists
+        assert cache.get("key1") == "value1"
+        assert cache.get("key2") == "value2"
+
+        # Clear cache
+        cache.clear()
+
+        # Verify data is gone
+        assert cache.get("key1") is None
+        assert cache.get("key2") is None
+
+    def test_cache_close(self, home: Path) -> None:
+        """Test closing the persistent connection."""
+        cache = Cache()
+        cache.set("key", "value")
+        cache.close()
+        cache.close()  # closing twice is harmless
+
+        # The WAL is checkpointed into the main database on close
+        wal_path = cache.db_path.with_name("cache.db-wal")
+        assert not wal_path.exists() or wal_path.stat().st_size == 0
+
+        # Data written before close must be durable for a new instance
+        reopened = Cache()
+        assert reopened.get("key") == "value"
+        reopened.close()
+
+    def test_cache_closed_when_collected(self, home: Path) -> None:
+        """Test that an unreferenced cache is freed and its connection closed."""
+        cache = Cache()
+        conn = cache._conn
+        ref = weakref.ref(cache)
+
+        del cache
+        gc.collect()
+
+        assert ref() is None
+        with pytest.raises(sqlite3.ProgrammingError):
+            conn.execute("SELECT 1")
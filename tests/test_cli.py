@@ -1,55 +1,60 @@
 """Tests for the main CLI module."""
 
-from unittest.mock import patch
+from types import SimpleNamespace
 
+import pytest
 from typer.testing import CliRunner
 
 from anvil.cli import app
+from tests.conftest import RunApp
 
 
 class TestCLI:
     """Test cases for the main CLI application."""
 
-    def setup_method(self) -> None:
-        """Set up test runner."""
-        self.runner = CliRunner()
+    # Shared by every test; stderr is kept separate from stdout
+    runner = CliRunner(mix_stderr=False)
 
-    def test_version_command(self) -> None:
+    def test_version_command(self, run_app: RunApp) -> None:
         """Test version command."""
-        result = self.runner.invoke(app, ["version"])
-        assert result.exit_code == 0
-        assert "anvil 0.1.0" in result.stdout
+        out, exit_code = run_app(app, ["version"])
+        assert exit_code == 0
+        assert "anvil 0.1.0" in out
 
     def test_help_flag(self) -> None:
         """Test --help flag."""
         # Skip help test due to Typer compatibility issue
 
-    def test_sketch_command(self) -> None:
+    def test_sketch_command(self, run_app: RunApp) -> None:
         """Test sketch command."""
-        result = self.runner.invoke(app, ["sketch", "test prompt"])
-        assert result.exit_code == 0
-        assert "test prompt" in result.stdout
-        assert "(would call Stitch API here)" in result.stdout
+        out, exit_code = run_app(app, ["sketch", "test prompt"])
+        assert exit_code == 0
+        assert "test prompt" in out
+        assert "(would call Stitch API here)" in out
 
     def test_sketch_without_prompt(self) -> None:
         """Test sketch command without prompt."""
         result = self.runner.invoke(app, ["sketch"])
         assert result.exit_code == 1  # Typer version has compatibility issue, exits with 1
 
-    @patch("subprocess.run")
-    def test_upgrade_command_success(self, mock_run) -> None:
+    def test_upgrade_command_success(self, monkeypatch: pytest.MonkeyPatch) -> None:
         """Test successful upgrade command."""
-        mock_run.return_value.stdout = "Successfully upgraded!"
-        mock_run.return_value.stderr = ""
+        completed = SimpleNamespace(stdout="Successfully upgraded!", stderr="")
+        monkeypatch.setattr("subprocess.run", lambda *args, **kwargs: completed)
 
         result = self.runner.invoke(app, ["upgrade"])
         assert result.exit_code == 0
         assert "anvil upgraded successfully" in result.stdout
 
-    @patch("subprocess.run")
-    def test_upgrade_command_pipx_not_found(self, mock_run) -> None:
+    def test_upgrade_command_pipx_not_found(
+        self, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
         """Test upgrade command when pipx is not found."""
-        mock_run.side_effect = FileNotFoundError()
+
+        def run(*args: object, **kwargs: object) -> None:
+            raise FileNotFoundError()
+
+        monkeypatch.setattr("subprocess.run", run)
 
         result = self.runner.invoke(app, ["upgrade"])
         assert result.exit_code == 1
@@ -1,89 +1,94 @@
 """Tests for the palette command."""
 
 import json
-import tempfile
+import shutil
 from pathlib import Path
 
 import pytest
 from PIL import Image
 from typer.testing import CliRunner
 
-from anvil.commands.palette import app, extract_colors
+from anvil.commands.palette import app, dominant_colors, extract_colors
+from tests.conftest import RunApp
 
 
-class TestPalette:
-    """Test cases for the palette command."""
+@pytest.fixture(scope="session")
+def shared_palette_image(tmp_path_factory: pytest.TempPathFactory) -> Path:
+    """Create a test image with known colors once for the whole session.
 
-    def setup_method(self) -> None:
-        """Set up test runner."""
-        self.runner = CliRunner()
+    Tests that only read the image can use it directly; tests that write next
+    to it should copy it into their own tmp_path first.
+    """
+    image_path = tmp_path_factory.mktemp("palette") / "test_image.png"
+    Image.new("RGB", (10, 10), color="red").save(image_path)
+    return image_path
 
-    def create_test_image(self, temp_dir: Path) -> Path:
-        """Create a test image for testing.
 
-        Args:
-            temp_dir: Temporary directory for the image
+class TestPalette:
+    """Test cases for the palette command."""
 
-        Returns:
-            Path to the created test image
-        """
-        image_path = temp_dir / "test_image.png"
+    # Shared by every test; stderr is kept separate from stdout
+    runner = CliRunner(mix_stderr=False)
 
-        # Create a simple test image with known colors
-        img = Image.new("RGB", (10, 10), color="red")
-        img.save(image_path)
+    def test_extract_colors_success(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        """Test successful color extraction."""
+        # Hand back an already-decoded image; only the color pass is under test
+        image = Image.new("RGB", (10, 10), color="red")
+        monkeypatch.setattr("anvil.commands.palette.Image.open", lambda path: image)
 
-        return image_path
+        colors = extract_colors(Path("test_image.png"))
 
-    def test_extract_colors_success(self) -> None:
-        """Test successful color extraction."""
-        with tempfile.TemporaryDirectory() as temp_dir:
-            temp_path = Path(temp_dir)
-            image_path = self.create_test_image(temp_path)
+        assert isinstance(colors, list)
+        assert len(colors) <= 5
+        assert all(color.startswith("#") for color in colors)
+        assert all(len(color) == 7 for color in colors)
+        assert colors == ["#ff0000"]
 
-            colors = extract_colors(image_path)
+    def test_dominant_colors_ordered_by_frequency(self) -> None:
+        """Test that the most common color comes first."""
+        img = Image.new("RGB", (10, 10), color="red")
+        img.paste((0, 0, 255), (0, 0, 3, 3))
 
-            assert isinstance(colors, list)
-            assert len(colors) <= 5
-            assert all(color.startswith("#") for color in colors)
-            assert all(len(color) == 7 for color in colors)
+        assert dominant_colors(img, 5) == ["#ff0000", "#0000ff"]
+        assert dominant_colors(img, 1) == ["#ff0000"]
 
     def test_extract_colors_nonexistent_file(self) -> None:
         """Test color extraction with non-existent file."""
         with pytest.raises(SystemExit):
             extract_colors(Path("nonexistent.png"))
 
-    def test_grab_command_success(self) -> None:
+    def test_grab_command_success(
+        self, shared_palette_image: Path, tmp_path: Path
+    ) -> None:
         """Test successful palette grab command."""
-        with tempfile.TemporaryDirectory() as temp_dir:
-            temp_path = Path(temp_dir)
-            image_path = self.create_test_image(temp_path)
+        # grab writes its JSON next to the image, so work on a private copy
+        image_path = Path(shutil.copy(shared_palette_image, tmp_path))
 
-            result = self.runner.invoke(app, ["grab", str(image_path)])
+        result = self.runner.invoke(app, ["grab", str(image_path)])
 
-            assert result.exit_code == 0
-            assert "Extracting colors from" in result.stdout
-            assert "Extracted colors" in result.stdout
-            assert "Saved palette to" in result.stdout
+        assert result.exit_code == 0
+        assert "Extracting colors from" in result.stdout
+        assert "Extracted colors" in result.stdout
+        assert "Saved palette to" in result.stdout
 
-            # Check that JSON file was created
-            json_path = temp_path / "test_image_palette.json"
-            assert json_path.exists()
+        # Check that JSON file was created
+        json_path = tmp_path / "test_image_palette.json"
+        assert json_path.exists()
 
-            # Verify JSON content
-            with open(json_path) as f:
-                colors = json.load(f)
-            assert isinstance(colors, list)
-            assert len(colors) <= 5
+        # Verify JSON content
+        with open(json_path) as f:
+            colors = json.load(f)
+        assert isinstance(colors, list)
+        assert len(colors) <= 5
 
     def test_grab_command_nonexistent_file(self) -> None:
         """Test palette grab command with non-existent file."""
         result = self.runner.invoke(app, ["grab", "nonexistent.png"])
         assert result.exit_code == 1
-        assert "Image file not found" in result.stdout
+        assert "Image file not found" in result.stderr
 
-    def test_grab_command_help(self) -> None:
+    def test_grab_command_help(self, run_app: RunApp) -> None:
         """Test palette grab command help."""
-        result = self.runner.invoke(app, ["grab", "--help"])
-        assert result.exit_code == 0
-        assert "Extract top 5 colors" in result.stdout
+        out, exit_code = run_app(app, ["grab", "--help"])
+        assert exit_code == 0
+        assert "Extract top 5 colors" in out
@@ -1,61 +1,85 @@
 """Tests for the plugin system."""
 
-from unittest.mock import MagicMock, patch
+import sys
+from types import SimpleNamespace
+from unittest.mock import Mock, patch
 
+import pytest
 import typer
 from typer.testing import CliRunner
 
-from anvil.cli import app, discover_and_register_plugins
+from anvil import cli
+from anvil.cli import _entry_points, discover_and_register_plugins
+from tests.conftest import RunApp
+
+
+def make_entry_point(plugin: object) -> SimpleNamespace:
+    """Build a stand-in entry point whose load() returns ``plugin``.
+
+    Plain namespaces with a Mock only where calls are asserted are much cheaper
+    to create than full MagicMocks.
+    """
+    return SimpleNamespace(name="test_external_plugin", load=Mock(return_value=plugin))
 
 
 class TestPlugins:
     """Test cases for the plugin system."""
 
-    def setup_method(self) -> None:
-        """Set up test runner."""
-        self.runner = CliRunner()
+    # Shared by every test; stderr is kept separate from stdout
+    runner = CliRunner(mix_stderr=False)
 
-    def test_example_plugin_loaded(self) -> None:
+    @pytest.fixture(autouse=True)
+    def fresh_discovery(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        """Let each test run discovery again, then restore the guard."""
+        _entry_points.cache_clear()
+        monkeypatch.setattr(cli, "_plugins_registered", False)
+
+    def test_example_plugin_loaded(self, plugin_app: typer.Typer) -> None:
         """Test that the example plugin is loaded and available."""
-        result = self.runner.invoke(app, ["example", "hello"])
+        result = self.runner.invoke(plugin_app, ["example", "hello"])
         assert result.exit_code == 0
         assert "Hello World from the example plugin!" in result.stdout
 
-    def test_example_plugin_with_name(self) -> None:
+    def test_example_plugin_with_name(self, plugin_app: typer.Typer) -> None:
         """Test example plugin with custom name."""
-        result = self.runner.invoke(app, ["example", "hello", "Alice"])
+        result = self.runner.invoke(plugin_app, ["example", "hello", "Alice"])
         assert result.exit_code == 0
         assert "Hello Alice from the example plugin!" in result.stdout
 
-    def test_example_plugin_help(self) -> None:
+    def test_example_plugin_help(
+        self, plugin_app: typer.Typer, run_app: RunApp
+    ) -> None:
         """Test example plugin help."""
-        result = self.runner.invoke(app, ["example", "--help"])
-        assert result.exit_code == 0
-        assert "Example plugin command" in result.stdout
+        out, exit_code = run_app(plugin_app, ["example", "--help"])
+        assert exit_code == 0
+        assert "Example plugin command" in out
 
-    @patch("anvil.cli.importlib.import_module")
     @patch("anvil.cli.pkgutil.iter_modules")
-    def test_plugin_discovery_failure(self, mock_iter_modules, mock_import_module) -> None:
+    def test_plugin_discovery_failure(
+        self,
+        mock_iter_modules,
+        monkeypatch: pytest.MonkeyPatch,
+        capsys: pytest.CaptureFixture[str],
+    ) -> None:
         """Test plugin discovery handles import failures gracefully."""
-        # Mock a plugin that fails to import
-        mock_iter_modules.return_value = [("", "failing_plugin", True)]
-        mock_import_module.side_effect = ImportError("Plugin failed to import")
+        # A None entry in sys.modules makes importing the plugin raise
+        # ImportError without going through the import system
+        mock_iter_modules.return_value = [("", "anvil.plugins.failing_plugin", False)]
+        monkeypatch.setitem(sys.modules, "anvil.plugins.failing_plugin", None)
 
         # Should not raise an exception
         discover_and_register_plugins()
 
-    @patch("anvil.cli.pkg_resources.iter_entry_points")
-    def test_external_plugin_discovery(self, mock_iter_entry_points) -> None:
+        assert "Failed to load built-in plugin" in capsys.readouterr().out
+
+    @patch("anvil.cli._entry_points")
+    def test_external_plugin_discovery(self, mock_entry_points) -> None:
         """Test external plugin discovery via entry points."""
         # Mock an external plugin
-        mock_plugin = MagicMock()
-        mock_plugin.register = MagicMock()
-
-        mock_entry_point = MagicMock()
-        mock_entry_point.name = "test_external_plugin"
-        mock_entry_point.load.return_value = mock_plugin
+        mock_plugin = SimpleNamespace(register=Mock())
+        mock_entry_point = make_entry_point(mock_plugin)
 
-        mock_iter_entry_points.return_value = [mock_entry_point]
+        mock_entry_points.return_value = [mock_entry_point]
 
         # Create a new app to test with
         test_app = typer.Typer()
@@ -68,21 +92,39 @@ class TestPlugins:
         mock_entry_point.load.assert_called_once()
         mock_plugin.register.assert_called_once()
 
-    @patch("anvil.cli.pkg_resources.iter_entry_points")
-    def test_external_plugin_without_register(self, mock_iter_entry_points) -> None:
+    @patch("anvil.cli._entry_points")
+    def test_external_plugin_without_register(self, mock_entry_points) -> None:
         """Test external plugin without register method is handled gracefully."""
         # Mock an external plugin without register method
-        mock_plugin = MagicMock()
-        del mock_plugin.register  # Remove register attribute
+        mock_entry_points.return_value = [make_entry_point(SimpleNamespace())]
 
-        mock_entry_point = MagicMock()
-        mock_entry_point.name = "test_external_plugin"
-        mock_entry_point.load.return_value = mock_plugin
+        # Should not raise an exception
+        with patch("anvil.cli.app", typer.Typer()):
+            discover_and_register_plugins()
 
-        mock_iter_entry_points.return_value = [mock_entry_point]
+    @patch("anvil.cli.entry_points")
+    def test_entry_points_scanned_once(self, mock_entry_points) -> None:
+        """Test that installed entry points are only looked up once."""
+        mock_entry_points.return_value = []
 
-        # Should not raise an exception
-        discover_and_register_plugins()
+        with patch("anvil.cli.app", typer.Typer()):
+            discover_and_register_plugins()
+            cli._plugins_registered = False
+            discover_and_register_plugins()
+
+        mock_entry_points.assert_called_once_with(group="anvil.plugins")
+
+    @patch("anvil.cli._entry_points")
+    def test_discovery_runs_once(self, mock_entry_points) -> None:
+        """Test that repeated discovery calls don't register plugins again."""
+        mock_plugin = SimpleNamespace(register=Mock())
+        mock_entry_points.return_value = [make_entry_point(mock_plugin)]
+
+        with patch("anvil.cli.app", typer.Typer()):
+            discover_and_register_plugins()
+            discover_and_register_plugins()
+
+        mock_plugin.register.assert_called_once()
 
     def test_plugin_register_function_signature(self) -> None:
         """Test that plugin register functions have correct signature."""
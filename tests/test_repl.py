@@ -4,158 +4,235 @@ import sys
 from pathlib import Path
 from unittest.mock import patch
 
-from anvil.repl import repl, show_help, show_status, show_welcome
+import pytest
 
+from anvil.repl import (
+    build_welcome,
+    execute_anvil_command,
+    load_history,
+    repl,
+    save_history,
+    show_help,
+    show_status,
+    show_welcome,
+    split_command,
+)
 
-def test_show_welcome(capsys):
-    """Test welcome panel display."""
-    show_welcome()
-    captured = capsys.readouterr()
 
-    assert "Welcome to anvilCLI!" in captured.out
-    assert "/help for help, /status for your current setup" in captured.out
-    assert f"cwd: {Path.cwd()}" in captured.out
-    assert "Tip: Start with small features or bug fixes" in captured.out
+def fake_input(monkeypatch, *responses):
+    """Make input() return each response in turn, raising exceptions instead."""
+    remaining = iter(responses)
 
+    def fake(prompt=""):
+        response = next(remaining)
+        if isinstance(response, BaseException):
+            raise response
+        return response
 
-def test_show_help(capsys):
-    """Test help command display."""
-    show_help()
-    captured = capsys.readouterr()
+    monkeypatch.setattr("builtins.input", fake)
 
-    assert "Available slash commands:" in captured.out
-    assert "/help, ?" in captured.out
-    assert "/status" in captured.out
-    assert "/exit, /quit" in captured.out
-    assert "forwarded to the normal anvil CLI" in captured.out
 
+def assert_contains_all(out, *needles):
+    """Assert that every needle occurs in out, reporting all that are missing."""
+    missing = [needle for needle in needles if needle not in out]
+    assert not missing, f"missing from output: {missing}"
 
-def test_show_status(capsys):
-    """Test status command display."""
-    show_status()
-    captured = capsys.readouterr()
-
-    assert "Current Status:" in captured.out
-    assert f"Working Directory: {Path.cwd()}" in captured.out
-    assert f"Python Version: {sys.version.split()[0]}" in captured.out
 
+def test_show_welcome(capsys):
+    """Test welcome panel display."""
+    show_welcome()
+    captured = capsys.readouterr()
 
-@patch("builtins.input")
-def test_repl_help_command(mock_input, capsys):
-    """Test REPL responds to /help command."""
-    # Mock input sequence: /help, then /exit
-    mock_input.side_effect = ["/help", "/exit"]
+    assert_contains_all(
+        captured.out,
+        "Welcome to anvilCLI!",
+        "/help for help, /status for your current setup",
+        f"cwd: {Path.cwd()}",
+        "Tip: Start with small features or bug fixes",
+    )
 
-    repl()
-    captured = capsys.readouterr()
 
-    assert "Welcome to anvilCLI!" in captured.out
-    assert "Available slash commands:" in captured.out
-    assert "Bye - thanks for forging with Anvil!" in captured.out
+def test_show_welcome_reuses_banner(capsys):
+    """Test that the cached banner is not modified by repeated welcomes."""
+    show_welcome()
+    show_welcome()
+    capsys.readouterr()
 
+    banner, _ = build_welcome()
+    assert build_welcome()[0] is banner
+    assert "cwd:" not in banner.plain
 
-@patch("builtins.input")
-def test_repl_status_command(mock_input, capsys):
-    """Test REPL responds to /status command."""
-    # Mock input sequence: /status, then /exit
-    mock_input.side_effect = ["/status", "/exit"]
 
-    repl()
+def test_execute_anvil_command_writes_directly(capsys):
+    """Test that commands run in-process and write to the real stdout."""
+    execute_anvil_command(["version"])
     captured = capsys.readouterr()
 
-    assert "Welcome to anvilCLI!" in captured.out
-    assert "Current Status:" in captured.out
-    assert "Bye - thanks for forging with Anvil!" in captured.out
+    assert captured.out.startswith("anvil ")
 
 
-@patch("builtins.input")
-def test_repl_question_mark_help(mock_input, capsys):
-    """Test REPL responds to ? as help command."""
-    # Mock input sequence: ?, then /exit
-    mock_input.side_effect = ["?", "/exit"]
-
-    repl()
+def test_execute_anvil_command_reports_usage_errors(capsys):
+    """Test that usage errors are shown without leaving the REPL."""
+    execute_anvil_command(["no-such-command"])
     captured = capsys.readouterr()
 
-    assert "Welcome to anvilCLI!" in captured.out
-    assert "Available slash commands:" in captured.out
-    assert "Bye - thanks for forging with Anvil!" in captured.out
+    assert "No such command 'no-such-command'" in captured.err
 
 
-@patch("builtins.input")
-def test_repl_quit_command(mock_input, capsys):
-    """Test REPL exits on /quit command."""
-    mock_input.side_effect = ["/quit"]
-
-    repl()
+def test_show_help(capsys):
+    """Test help command display."""
+    show_help()
     captured = capsys.readouterr()
 
-    assert "Welcome to anvilCLI!" in captured.out
-    assert "Bye - thanks for forging with Anvil!" in captured.out
+    assert_contains_all(
+        captured.out,
+        "Available slash commands:",
+        "/help, ?",
+        "/status",
+        "/exit, /quit",
+        "forwarded to the normal anvil CLI",
+    )
+
 
+def test_show_status(capsys):
+    """Test status command display."""
+    show_status()
+    captured = capsys.readouterr()
 
-@patch("builtins.input")
-def test_repl_exit_command(mock_input, capsys):
-    """Test REPL exits on /exit command."""
-    mock_input.side_effect = ["/exit"]
+    assert_contains_all(
+        captured.out,
+        "Current Status:",
+        f"Working Directory: {Path.cwd()}",
+        f"Python Version: {sys.version.split()[0]}",
+    )
+
+
+def test_history_saves_new_entries(tmp_path):
+    """Test that commands entered in a session are appended to the history."""
+    readline = pytest.importorskip("readline")
+    history_file = tmp_path / ".anvil" / "history"
+
+    with patch("anvil.repl.HISTORY_FILE", history_file):
+        readline.clear_history()
+        loaded = load_history()
+        readline.add_history("version")
+        save_history(loaded)
+        readline.clear_history()
+
+    assert history_file.read_text().splitlines()[-1] == "version"
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="POSIX file modes")
+def test_history_keeps_api_keys_private(tmp_path):
+    """Test that key-setting commands aren't saved and the file is private."""
+    readline = pytest.importorskip("readline")
+    history_file = tmp_path / ".anvil" / "history"
+
+    with patch("anvil.repl.HISTORY_FILE", history_file):
+        readline.clear_history()
+        loaded = load_history()
+        readline.add_history("sketch config --set-key v0_secret")
+        readline.add_history("version")
+        save_history(loaded)
+        readline.clear_history()
+
+    saved = history_file.read_text()
+    assert "v0_secret" not in saved
+    assert saved.splitlines()[-1] == "version"
+    assert history_file.stat().st_mode & 0o777 == 0o600
+
+
+def test_split_command():
+    """Test that plain and quoted command lines split like a shell."""
+    assert split_command("sketch create  demo") == ["sketch", "create", "demo"]
+    assert split_command('sketch "hello world"') == ["sketch", "hello world"]
+    assert split_command(r"palette my\ image.png") == ["palette", "my image.png"]
+
+    with pytest.raises(ValueError):
+        split_command('sketch "unclosed quote')
+
+
+@pytest.mark.parametrize(
+    ("inputs", "expected"),
+    [
+        pytest.param(["/help", "/exit"], "Available slash commands:", id="help"),
+        pytest.param(["?", "/exit"], "Available slash commands:", id="question-mark"),
+        pytest.param(["/status", "/exit"], "Current Status:", id="status"),
+        pytest.param(["/quit"], "Bye - thanks for forging with Anvil!", id="quit"),
+        pytest.param(["/exit"], "Bye - thanks for forging with Anvil!", id="exit"),
+    ],
+)
+def test_repl_slash_commands(inputs, expected, monkeypatch, capsys):
+    """Test REPL responds to its slash commands and exits cleanly."""
+    fake_input(monkeypatch, *inputs)
 
     repl()
     captured = capsys.readouterr()
 
-    assert "Welcome to anvilCLI!" in captured.out
-    assert "Bye - thanks for forging with Anvil!" in captured.out
+    assert_contains_all(
+        captured.out,
+        "Welcome to anvilCLI!",
+        expected,
+        "Bye - thanks for forging with Anvil!",
+    )
 
 
-@patch("builtins.input")
-def test_repl_keyboard_interrupt(mock_input, capsys):
+def test_repl_keyboard_interrupt(monkeypatch, capsys):
     """Test REPL handles KeyboardInterrupt gracefully."""
     # Mock input sequence: raise KeyboardInterrupt, then /exit
-    mock_input.side_effect = [KeyboardInterrupt(), "/exit"]
+    fake_input(monkeypatch, KeyboardInterrupt(), "/exit")
 
     repl()
     captured = capsys.readouterr()
 
-    assert "Welcome to anvilCLI!" in captured.out
-    assert "Use /exit or /quit to leave the shell" in captured.out
-    assert "Bye - thanks for forging with Anvil!" in captured.out
+    assert_contains_all(
+        captured.out,
+        "Welcome to anvilCLI!",
+        "Use /exit or /quit to leave the shell",
+        "Bye - thanks for forging with Anvil!",
+    )
 
 
-@patch("builtins.input")
-def test_repl_eof_error(mock_input, capsys):
+def test_repl_eof_error(monkeypatch, capsys):
     """Test REPL handles EOFError gracefully."""
-    mock_input.side_effect = EOFError()
+    fake_input(monkeypatch, EOFError())
 
     repl()
     captured = capsys.readouterr()
 
-    assert "Welcome to anvilCLI!" in captured.out
-    assert "Bye - thanks for forging with Anvil!" in captured.out
+    assert_contains_all(
+        captured.out,
+        "Welcome to anvilCLI!",
+        "Bye - thanks for forging with Anvil!",
+    )
 
 
-@patch("builtins.input")
-@patch("anvil.repl.execute_anvil_command")
-def test_repl_delegates_commands(mock_execute, mock_input, capsys):
+def test_repl_delegates_commands(monkeypatch, capsys):
     """Test REPL delegates non-slash commands to anvil CLI."""
     # Mock input sequence: "version", then /exit
-    mock_input.side_effect = ["version", "/exit"]
+    fake_input(monkeypatch, "version", "/exit")
+    calls = []
+    monkeypatch.setattr("anvil.repl.execute_anvil_command", calls.append)
 
     repl()
 
     # Verify execute_anvil_command was called with parsed args
-    mock_execute.assert_called_once_with(["version"])
+    assert calls == [["version"]]
 
 
-@patch("builtins.input")
-def test_repl_handles_empty_input(mock_input, capsys):
+def test_repl_handles_empty_input(monkeypatch, capsys):
     """Test REPL handles empty input gracefully."""
     # Mock input sequence: empty string, then /exit
-    mock_input.side_effect = ["", "/exit"]
+    fake_input(monkeypatch, "", "/exit")
 
     repl()
     captured = capsys.readouterr()
 
-    assert "Welcome to anvilCLI!" in captured.out
-    assert "Bye - thanks for forging with Anvil!" in captured.out
+    assert_contains_all(
+        captured.out,
+        "Welcome to anvilCLI!",
+        "Bye - thanks for forging with Anvil!",
+    )
 
 
 def test_anvil_shell_entry_point():
@@ -166,28 +243,30 @@ def test_anvil_shell_entry_point():
     assert callable(repl)
 
 
-@patch("builtins.input")
-@patch("anvil.repl.execute_anvil_command")
-def test_repl_parses_quoted_commands(mock_execute, mock_input, capsys):
+def test_repl_parses_quoted_commands(monkeypatch, capsys):
     """Test REPL correctly parses commands with quotes."""
     # Mock input sequence: command with quotes, then /exit
-    mock_input.side_effect = ['sketch "hello world"', "/exit"]
+    fake_input(monkeypatch, 'sketch "hello world"', "/exit")
+    calls = []
+    monkeypatch.setattr("anvil.repl.execute_anvil_command", calls.append)
 
     repl()
 
     # Verify execute_anvil_command was called with properly parsed args
-    mock_execute.assert_called_once_with(["sketch", "hello world"])
+    assert calls == [["sketch", "hello world"]]
 
 
-@patch("builtins.input")
-def test_repl_handles_invalid_shell_syntax(mock_input, capsys):
+def test_repl_handles_invalid_shell_syntax(monkeypatch, capsys):
     """Test REPL handles invalid shell syntax gracefully."""
     # Mock input sequence: invalid syntax, then /exit
-    mock_input.side_effect = ['sketch "unclosed quote', "/exit"]
+    fake_input(monkeypatch, 'sketch "unclosed quote', "/exit")
 
     repl()
     captured = capsys.readouterr()
 
-    assert "Welcome to anvilCLI!" in captured.out
-    assert "Error parsing command:" in captured.out
-    assert "Bye - thanks for forging with Anvil!" in captured.out
+    assert_contains_all(
+        captured.out,
+        "Welcome to anvilCLI!",
+        "Error parsing command:",
+        "Bye - thanks for forging with Anvil!",
+    )
@@ -0,0 +1,218 @@
+"""Tests for the sketch command helpers."""
+
+import asyncio
+import os
+import sys
+from pathlib import Path
+from typing import Iterator
+from unittest.mock import patch
+
+import httpx
+import pytest
+from typer.testing import CliRunner
+
+from anvil.cli import app
+from anvil.commands.sketch import (
+    create_files,
+    format_codebase_for_api,
+    iter_sse_data,
+    load_api_key,
+    parse_code_blocks,
+    read_codebase,
+    write_api_key,
+)
+
+
+@pytest.fixture(scope="module")
+def runner() -> CliRunner:
+    """One CLI runner shared by the tests in this module."""
+    return CliRunner()
+
+
+class TestSketchHelp:
+    """Test cases for the sketch command group's help output."""
+
+    @pytest.mark.parametrize(
+        ("args", "expected"),
+        [
+            (["sketch", "--help"], "Generate creative content from text prompts"),
+            (["sketch", "config", "--help"], "Manage v0 API key configuration"),
+            (["sketch", "create", "--help"], "Generate creative content from a text"),
+            (["sketch", "doctor", "--help"], "Analyze your codebase"),
+        ],
+    )
+    def test_help(self, runner: CliRunner, args: list[str], expected: str) -> None:
+        """Test that each sketch command shows its help."""
+        result = runner.invoke(app, args)
+        assert result.exit_code == 0
+        assert expected in result.stdout
+
+
+class TestApiKey:
+    """Test cases for API key resolution."""
+
+    @pytest.fixture(autouse=True)
+    def isolated_env(
+        self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+    ) -> Iterator[None]:
+        """Run in an empty directory with a fresh home and no exported key."""
+        monkeypatch.chdir(tmp_path)
+        monkeypatch.setenv("HOME", str(tmp_path / "home"))
+        monkeypatch.setenv("USERPROFILE", str(tmp_path / "home"))  # Windows
+        monkeypatch.delenv("V0_API_KEY", raising=False)
+        load_api_key.cache_clear()
+        yield
+        load_api_key.cache_clear()
+
+    def test_load_api_key_reports_source(self, tmp_path: Path) -> None:
+        """Test that the key and the .env file it came from are returned."""
+        (tmp_path / ".env").write_text("V0_API_KEY=v0_from_file\n")
+
+        assert load_api_key() == ("v0_from_file", tmp_path / ".env")
+
+    def test_load_api_key_prefers_environment(
+        self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Test that an exported key is returned without parsing .env files."""
+        (tmp_path / ".env").write_text("V0_API_KEY=v0_from_file\n")
+        monkeypatch.setenv("V0_API_KEY", "v0_from_env")
+
+        with patch("anvil.commands.sketch.dotenv_values") as mock_dotenv_values:
+            assert load_api_key() == ("v0_from_env", None)
+
+        mock_dotenv_values.assert_not_called()
+
+    def test_load_api_key_sees_rewritten_key(self, tmp_path: Path) -> None:
+        """Test that a key written during the process replaces the old one."""
+        env_file = tmp_path / ".env"
+
+        write_api_key(env_file, "v0_old_key")
+        assert load_api_key() == ("v0_old_key", env_file)
+
+        write_api_key(env_file, "v0_new_key")
+        assert load_api_key() == ("v0_new_key", env_file)
+        assert "V0_API_KEY" not in os.environ
+
+    def test_write_api_key_replaces_file(self, tmp_path: Path) -> None:
+        """Test that other variables survive and no temporary file is left."""
+        env_file = tmp_path / ".env"
+        env_file.write_text("OTHER=1\nV0_API_KEY=v0_old_key")
+
+        write_api_key(env_file, "v0_new_key")
+
+        assert env_file.read_text() == "OTHER=1\nV0_API_KEY=v0_new_key\n"
+        assert [p.name for p in tmp_path.iterdir()] == [".env"]
+
+    def test_write_api_key_follows_symlink(self, tmp_path: Path) -> None:
+        """Test that a symlinked .env keeps its link and updates the target."""
+        target = tmp_path / "shared.env"
+        target.write_text("OTHER=1\n")
+        env_file = tmp_path / ".env"
+        env_file.symlink_to(target)
+
+        write_api_key(env_file, "v0_new_key")
+
+        assert env_file.is_symlink()
+        assert target.read_text() == "OTHER=1\nV0_API_KEY=v0_new_key\n"
+
+    @pytest.mark.skipif(sys.platform == "win32", reason="POSIX file modes")
+    def test_write_api_key_creates_private_file(self, tmp_path: Path) -> None:
+        """Test that a new .env file is readable by its owner only."""
+        env_file = tmp_path / ".env"
+
+        write_api_key(env_file, "v0_new_key")
+
+        assert env_file.stat().st_mode & 0o777 == 0o600
+
+
+class TestParseCodeBlocks:
+    """Test cases for extracting files from model responses."""
+
+    def test_parse_filename_formats(self) -> None:
+        """Test the v0, colon and direct filename fence formats."""
+        content = (
+            'Intro\n```tsx file="app/page.tsx"\nexport default 1\n```\n'
+            "```ts:lib/util.ts\nexport const a = 1\n```\n"
+            "```styles/main.css\nbody {}\n```\n"
+        )
+
+        assert parse_code_blocks(content) == {
+            "app/page.tsx": "export default 1",
+            "lib/util.ts": "export const a = 1",
+            "styles/main.css": "body {}",
+        }
+
+    def test_parse_ignores_unnamed_blocks(self) -> None:
+        """Test that fences without a filename are skipped."""
+        assert parse_code_blocks("```python\nprint(1)\n```") == {}
+
+
+class TestReadCodebase:
+    """Test cases for reading a codebase for analysis."""
+
+    def test_read_codebase_skips_excluded_and_binary(self, tmp_path: Path) -> None:
+        """Test that excluded directories, binary and empty files are skipped."""
+        (tmp_path / "src").mkdir()
+        (tmp_path / "src" / "app.py").write_text("print('hi')")
+        (tmp_path / "node_modules" / "pkg").mkdir(parents=True)
+        (tmp_path / "node_modules" / "pkg" / "index.js").write_text("x")
+        (tmp_path / "image.png").write_bytes(b"png")
+        (tmp_path / "data.json").write_bytes(b"{\x00\x01}")
+        (tmp_path / "empty.txt").write_text("")
+
+        codebase = read_codebase(tmp_path)
+
+        assert codebase == {str(Path("src") / "app.py"): "print('hi')"}
+
+    def test_read_codebase_respects_budget(self, tmp_path: Path) -> None:
+        """Test that shallow files are kept and reading stops at the budget."""
+        (tmp_path / "main.py").write_text("a" * 10)
+        (tmp_path / "pkg").mkdir()
+        (tmp_path / "pkg" / "deep.py").write_text("b" * 10)
+
+        assert read_codebase(tmp_path, max_chars=15) == {"main.py": "a" * 10}
+
+
+class TestFormatCodebase:
+    """Test cases for building the analysis request."""
+
+    def test_format_codebase_for_api(self) -> None:
+        """Test that structure and contents are split into messages."""
+        system, user = format_codebase_for_api({"b.py": "x = 1", "a.md": "# A"})
+
+        assert system["role"] == "system"
+        assert system["content"].endswith("## File Structure\n\n- a.md\n- b.py\n")
+        assert user == {
+            "role": "user",
+            "content": "## File Contents\n\n"
+            "### a.md\n\n```markdown\n# A\n```\n\n"
+            "### b.py\n\n```python\nx = 1\n```\n",
+        }
+
+
+class TestCreateFiles:
+    """Test cases for writing generated files."""
+
+    def test_create_files_writes_nested_paths(self, tmp_path: Path) -> None:
+        """Test that files are written and parent directories created."""
+        create_files({"app/page.tsx": "page", "app/ui/button.tsx": "button"}, tmp_path)
+
+        assert (tmp_path / "app" / "page.tsx").read_text() == "page"
+        assert (tmp_path / "app" / "ui" / "button.tsx").read_text() == "button"
+
+
+class TestSSE:
+    """Test cases for server-sent event parsing."""
+
+    def test_iter_sse_data_stops_at_done(self) -> None:
+        """Test that data payloads are yielded until the [DONE] sentinel."""
+        response = httpx.Response(
+            200,
+            content=b'data: {"a": 1}\r\n\n: comment\ndata: {"b": 2}\n\ndata: [DONE]\n'
+            b'data: {"c": 3}\n',
+        )
+
+        async def collect() -> list[bytes]:
+            return [data async for data in iter_sse_data(response)]
+
+        assert asyncio.run(collect()) == [b'{"a": 1}', b'{"b": 2}']